@@ -1,6 +1,24 @@
 import streamlit as st
+from streamlit import runtime
+from streamlit.runtime.scriptrunner import get_script_run_ctx
 import pandas as pd
-import io
+import numpy as np
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+import hashlib
+import threading
+import os
+from collections import OrderedDict
+
+from inventory_engine import (XLSX_READERS, DEFAULT_XLSX_READER, DEFAULT_CSV_CHUNKSIZE, MASTER_COLUMNS, AMOUNT_COLUMNS, ACCOUNT_GROUPS,
+                              parse_inventory_files, aggregate_periods, build_comparison, build_item_index,
+                              read_group_mapping, apply_group_mapping,
+                              build_summary_cube, summarize_cube, build_analysis_workbook, build_mapping_workbook,
+                              ComputationGraph, series_fingerprint, frame_memory,
+                              TREND_METRICS, TREND_METRIC_ACCOUNTS, TREND_BASE_MONTHS, parse_ledger_month, month_label, trailing_months,
+                              build_trend_matrix, summarize_trend, trend_group_names, trend_series, trend_items)
+from ledger_store import LEDGER_ROLES, DEFAULT_STORE_DIR, LedgerStore
+from diagnostics import StageProfiler, set_memory_tracing, dump_profiles, current_rss
 
 # 페이지 설정
 st.set_page_config(page_title="회계 수불 증감 통합 분석", layout="wide")
@@ -19,50 +37,154 @@ st.markdown("""
     </style>
     """, unsafe_allow_html=True)
 
+# [진단] 스크립트 실행(위젯 조작) 1회 = 프로파일 1건, 세션별로 최근 DIAGNOSTICS_HISTORY 건 보관
+DIAGNOSTICS_HISTORY = 20
+profiler = StageProfiler()
+
 st.title("📦 Financial Inventory Variance Analysis")
 st.markdown("기말재고 및 재료비/매출원가 증감 분석을 위한 통합 시스템입니다.")
 
-# 1. 데이터 전처리 함수
-def process_inventory_data(file):
-    if file is None: return None
-    try:
-        df_raw = pd.read_csv(file, header=None) if file.name.endswith('.csv') else pd.read_excel(file, header=None)
-        header_main = df_raw.iloc[0].ffill()
-        header_sub = df_raw.iloc[1].fillna('')
-        new_cols = []
-        for m, s in zip(header_main, header_sub):
-            col_name = f"{m}_{s}".strip("_") if s != '' else str(m)
-            new_cols.append(col_name)
-        df = df_raw.iloc[2:].copy()
-        df.columns = new_cols
-        
-        for col in ['품목계정그룹', '품목코드', '품목명', '단위']:
-            if col in df.columns:
-                df[col] = df[col].astype(str).str.strip().replace('nan', '')
-                
-        df['품목계정그룹'] = df['품목계정그룹'].replace('제품(OEM)', '제품')
-        df = df[df['품목코드'] != '']
-        
-        numeric_cols = [c for c in df.columns if '수량' in c or '금액' in c]
-        for col in numeric_cols:
-            df[col] = pd.to_numeric(df[col].astype(str).str.replace(',', ''), errors='coerce').fillna(0)
-            
-        if '기말재고_금액' not in df.columns:
-            possible_stock_cols = [c for c in df.columns if '기말재고' in c and '금액' in c]
-            if possible_stock_cols:
-                df.rename(columns={possible_stock_cols[-1]: '기말재고_금액'}, inplace=True)
-                
-        return df
-    except Exception as e:
-        st.error(f"⚠️ {file.name} 처리 중 오류: {e}")
-        return None
+# 1. 데이터 전처리 함수 (원가수불부 파싱은 inventory_engine.process_inventory_data)
+# [캐시] 파일 내용 해시 + 파서 버전 기준 파싱/집계 결과 캐시
+# - 위젯 클릭마다 스크립트가 재실행되어도 파일이 바뀌지 않았다면 재파싱하지 않음
+# - 전처리 로직을 바꾸면 PARSER_VERSION 을 올려 기존 캐시를 무효화
+PARSER_VERSION = 2
+LEDGER_CACHE_MAX_ENTRIES = 40  # 파일 5개 x 약 8개 기간 (매핑 파일 포함)
+
+class LedgerCache:
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._entries: return None
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            # 가장 오래 사용되지 않은 항목부터 제거 (LRU)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+# 세션이 아닌 서버 프로세스 단위로 공유 (같은 파일을 여러 사용자가 올려도 1회만 파싱)
+@st.cache_resource
+def get_ledger_cache():
+    return LedgerCache(LEDGER_CACHE_MAX_ENTRIES)
+
+# 업로드 파일 해시는 업로드(file_id)별로 한 번만 계산 (월별 추이 분석처럼 파일이 많아도 위젯 조작마다 다시 해시하지 않음)
+def file_digest(file):
+    file_id = getattr(file, 'file_id', None)
+    if file_id is None: return _buffer_sha256(file)
+    digests = st.session_state.setdefault('file_digests', {})
+    if file_id not in digests:
+        digests[file_id] = _buffer_sha256(file)
+    return digests[file_id]
+
+# getvalue() 는 파일 전체를 복사하므로 업로드 버퍼를 그대로 해시
+def _buffer_sha256(file):
+    with file.getbuffer() as view:
+        return hashlib.sha256(view).hexdigest()
+
+# 캐시에 없는 파일만 골라 병렬 파싱 (워커 수 1 이면 순차 처리)
+def load_inventory_files(files, file_hashes, max_workers=None, xlsx_reader=DEFAULT_XLSX_READER, csv_chunksize=None):
+    cache = get_ledger_cache()
+    keys = [('parse', h, PARSER_VERSION, xlsx_reader, csv_chunksize) for h in file_hashes]
+    dfs = [cache.get(k) for k in keys]
+
+    misses = [i for i, d in enumerate(dfs) if d is None]
+    step_timings = []
+    # 청크 단위로 읽는 CSV 는 업로드 버퍼에서 이 프로세스가 직접 읽음 (파일 전체 복사본을 만들어 워커로 보내지 않음)
+    streamed = [i for i in misses if csv_chunksize and files[i].name.endswith('.csv')]
+    pooled = [i for i in misses if i not in streamed]
+    with profiler.stage('parse', files=len(files), cache_misses=len(misses)):
+        results = dict(zip(streamed, parse_inventory_files([(files[i].name, files[i]) for i in streamed],
+                                                           max_workers=1, csv_chunksize=csv_chunksize,
+                                                           step_timings=step_timings)))
+        results.update(zip(pooled, parse_inventory_files([(files[i].name, files[i].getvalue()) for i in pooled],
+                                                         max_workers=max_workers, xlsx_reader=xlsx_reader,
+                                                         csv_chunksize=csv_chunksize, step_timings=step_timings)))
+        # 워커 프로세스에서 잰 세부 단계(헤더 복원/숫자 변환 등) 시간: 파일 합계 (병렬 실행 시 경과 시간보다 클 수 있음)
+        for step in dict.fromkeys(k for t in step_timings for k in t):
+            profiler.add(f"parse.{step}", sum(t.get(step, 0.0) for t in step_timings), files=len(step_timings))
+    for i in misses:
+        df, err = results[i]
+        if err is not None:
+            # 오류가 난 파일은 캐시하지 않음 (재실행 시 오류 메시지를 다시 표시)
+            st.error(f"⚠️ {files[i].name} 처리 중 오류: {err}")
+            continue
+        cache.put(keys[i], df)
+        dfs[i] = df
+    return dfs
+
+# [저장소] 전처리 결과를 Parquet 으로 보관해 다음 달에 이전 기간 파일을 다시 올리지 않도록 함
+@st.cache_resource
+def get_ledger_store():
+    return LedgerStore(DEFAULT_STORE_DIR, parser_version=PARSER_VERSION)
+
+def load_stored_ledger(entry):
+    cache = get_ledger_cache()
+    key = ('store', entry.path, entry.source_hash, PARSER_VERSION)
+    df = cache.get(key)
+    if df is None:
+        df = get_ledger_store().load(entry, columns=MASTER_COLUMNS + AMOUNT_COLUMNS)
+        cache.put(key, df)
+    return df
+
+# 커스텀 매핑 파일(품목코드 -> 분석그룹) 읽기, 파일 내용이 같으면 재사용
+def load_group_mapping(f_mapping):
+    cache = get_ledger_cache()
+    key = ('mapping', file_digest(f_mapping))
+    mapping_dict = cache.get(key)
+    if mapping_dict is None:
+        try:
+            mapping_dict = read_group_mapping(f_mapping)
+        except Exception as e:
+            st.sidebar.error(f"매핑 파일 오류: {e}")
+            return {}
+        cache.put(key, mapping_dict)
+    return mapping_dict
+
+# 분석 파이프라인 그래프 (세션별 보관: 다른 사용자의 매핑 수정과 섞이지 않도록)
+def get_pipeline():
+    if 'pipeline' not in st.session_state:
+        graph = ComputationGraph()
+        graph.add_node('item_index', build_item_index, ['ledgers'])
+        graph.add_node('item_master', lambda item_index: item_index.items, ['item_index'])
+        graph.add_node('period_values', aggregate_periods, ['ledgers', 'item_index'])
+        graph.add_node('comparison_base', build_comparison, ['item_master', 'period_values'])
+        graph.add_node('comparison', lambda comp, item_groups: comp.assign(분석그룹=pd.Categorical(item_groups.to_numpy())),
+                       ['comparison_base', 'item_groups'])
+        graph.add_node('summary_cube', build_summary_cube, ['comparison'])
+        graph.add_node('summary', summarize_cube, ['summary_cube'])
+        graph.add_node('analysis_workbook', build_analysis_workbook, ['summary', 'comparison'])
+        graph.add_node('mapping_workbook', build_mapping_workbook, ['item_master', 'item_groups'])
+        st.session_state['pipeline'] = graph
+    return st.session_state['pipeline']
+
+# 월별 추이 분석 그래프: 월별 자료 -> 품목 x 월 행렬 -> 계정/분석그룹별 월 합계·증감
+# (분석그룹 매핑만 바뀌면 행렬은 그대로 두고 합계만 다시 계산)
+def get_trend_pipeline():
+    if 'trend_pipeline' not in st.session_state:
+        graph = ComputationGraph()
+        graph.add_node('trend_index', build_item_index, ['trend_ledgers'])
+        graph.add_node('trend', build_trend_matrix, ['trend_ledgers', 'trend_index', 'trend_months'])
+        graph.add_node('trend_groups', lambda trend_index, mapping: apply_group_mapping(trend_index.items, mapping),
+                       ['trend_index', 'group_mapping'])
+        graph.add_node('trend_totals', summarize_trend, ['trend', 'trend_groups', 'trend_window'])
+        st.session_state['trend_pipeline'] = graph
+    return st.session_state['trend_pipeline']
 
 # [신규] UI 화면 표출을 위한 합계 행 생성 함수 (인덱스 구조 및 틀 고정 유지용)
 def get_totals_with_index(df, index_val):
     if df.empty: return pd.DataFrame()
     num_cols = [c for c in df.columns if pd.api.types.is_numeric_dtype(df[c])]
     
-    totals = df[num_cols].apply(pd.to_numeric, errors='coerce').fillna(0).sum()
+    totals = df[num_cols].sum()
     
     total_data = {col: "" for col in df.columns}
     for col in num_cols:
@@ -79,21 +201,6 @@ def get_totals_with_index(df, index_val):
         
     return total_df
 
-# [신규] 엑셀 다운로드를 위한 합계 행 생성 함수 (일반 텍스트 열 유지용)
-def append_total_for_excel(df, label_col='품목명'):
-    if df.empty: return df
-    num_cols = [c for c in df.columns if pd.api.types.is_numeric_dtype(df[c])]
-    totals = df[num_cols].apply(pd.to_numeric, errors='coerce').fillna(0).sum()
-    
-    total_data = {col: "" for col in df.columns}
-    for col in num_cols:
-        total_data[col] = totals[col]
-    if label_col in total_data:
-        total_data[label_col] = '▶ 합계 (TOTAL)'
-        
-    total_df = pd.DataFrame([total_data])
-    return pd.concat([df, total_df], ignore_index=True)
-
 # 시각적 스타일링 함수
 def style_financial_df(df, diff_cols, text_cols, is_total=False):
     if df.empty: return df
@@ -117,8 +224,31 @@ def style_financial_df(df, diff_cols, text_cols, is_total=False):
                             subset=existing_diff_cols)
     return styler
 
+# 세부 품목 표: 셀 단위 Styler 콜백 대신 column_config 로 숫자 서식을 지정하고,
+# 증감 색상은 현재 페이지에 대해서만 열 단위(벡터) 연산으로 계산
+DETAIL_PAGE_SIZES = [50, 100, 200, 500]
+DETAIL_TOP_N_OPTIONS = [20, 50, 100, 500]
+DETAIL_NUMBER_FORMAT = "%,.0f"
+
+def style_variance_colors(df, diff_cols, is_total=False):
+    if df.empty: return df
+    existing_diff_cols = [c for c in diff_cols if c in df.columns]
+
+    def sign_colors(block):
+        values = block.to_numpy()
+        colors = np.where(values > 0, 'color: #D32F2F; font-weight: bold;',
+                          np.where(values < 0, 'color: #1565C0; font-weight: bold;', 'color: black'))
+        return pd.DataFrame(colors, index=block.index, columns=block.columns)
+
+    styler = df.style
+    if existing_diff_cols:
+        styler = styler.apply(sign_colors, axis=None, subset=existing_diff_cols)
+    if is_total:
+        styler = styler.set_properties(**{'font-weight': 'bold !important'})
+    return styler
+
 # 공통 Column Config 생성기
-def get_column_config(df_columns, text_cols):
+def get_column_config(df_columns, text_cols, number_format=None):
     config = {}
     for col in df_columns:
         if col in text_cols:
@@ -129,12 +259,18 @@ def get_column_config(df_columns, text_cols):
             else:
                 config[col] = st.column_config.TextColumn(col, width="medium")
         else:
-             config[col] = st.column_config.NumberColumn(col, width="medium")
+             config[col] = st.column_config.NumberColumn(col, width="medium", format=number_format)
     return config
 
 # 2-Step 분석 렌더링 함수
-def display_analysis_tab(df, target_cols, diff_cols, text_cols, tab_id):
-    temp_df = df[target_cols].copy()
+# df 는 호출부에서 열을 골라 만든 새 프레임이며 금액 열은 이미 float64 (재변환/복사 불필요)
+# group_summary: 집계 큐브에서 조회한 분석그룹별 합계 (없으면 df 에서 groupby)
+def display_analysis_tab(df, target_cols, diff_cols, text_cols, tab_id, group_summary=None):
+    with profiler.stage(f"display:{tab_id}", rows=len(df)):
+        render_analysis_tab(df, target_cols, diff_cols, text_cols, tab_id, group_summary)
+
+def render_analysis_tab(df, target_cols, diff_cols, text_cols, tab_id, group_summary=None):
+    temp_df = df[target_cols]
     num_cols = [c for c in temp_df.columns if c not in text_cols and c != '분석그룹']
     
     # -----------------------------------------------
@@ -143,8 +279,10 @@ def display_analysis_tab(df, target_cols, diff_cols, text_cols, tab_id):
     st.markdown("#### 1️⃣ 품목 그룹별 차이 요약")
     st.caption("💡 '커스텀 그룹핑' 설정에 따라 묶인 그룹 단위의 원가/재고 변동입니다. (← 좌우 스크롤 시 고정됨)")
     
-    temp_df[num_cols] = temp_df[num_cols].apply(pd.to_numeric, errors='coerce').fillna(0)
-    grp_summary = temp_df.groupby('분석그룹')[num_cols].sum().reset_index()
+    if group_summary is None:
+        grp_summary = temp_df.groupby('분석그룹')[num_cols].sum().reset_index()
+    else:
+        grp_summary = group_summary[['분석그룹'] + num_cols]
     if diff_cols: grp_summary = grp_summary.sort_values(diff_cols[0], ascending=False)
     
     col_config_grp = get_column_config(grp_summary.columns, text_cols + ['분석그룹'])
@@ -168,137 +306,292 @@ def display_analysis_tab(df, target_cols, diff_cols, text_cols, tab_id):
         detail_df = temp_df.drop(columns=['분석그룹'])
     else:
         detail_df = temp_df[temp_df['분석그룹'] == selected_grp].drop(columns=['분석그룹'])
-        
+
+    # [페이지 처리] 검색/상위 N 필터 후 현재 페이지의 행만 화면으로 전송
+    f_col1, f_col2, f_col3 = st.columns([4, 2, 2])
+    search = f_col1.text_input("🔍 품목코드/품목명 검색", key=f"{tab_id}_search")
+    top_n = f_col2.selectbox("차이 금액 상위", options=["전체"] + DETAIL_TOP_N_OPTIONS, key=f"{tab_id}_top_n",
+                             help=f"'{diff_cols[0]}' 절대값 기준" if diff_cols else None)
+    page_size = f_col3.selectbox("페이지당 품목 수", options=DETAIL_PAGE_SIZES, index=1, key=f"{tab_id}_page_size")
+
+    if search:
+        keyword = search.strip()
+        detail_df = detail_df[detail_df['품목코드'].str.contains(keyword, case=False, regex=False)
+                              | detail_df['품목명'].str.contains(keyword, case=False, regex=False)]
+    if diff_cols and top_n != "전체":
+        detail_df = detail_df.loc[detail_df[diff_cols[0]].abs().nlargest(top_n).index]
+
     if diff_cols: detail_df = detail_df.sort_values(diff_cols[0], ascending=False)
-        
-    col_config_dtl = get_column_config(detail_df.columns, text_cols)
-        
-    # [틀 고정] 품목코드, 품목명을 Multi-Index로 세팅
-    detail_display = detail_df.set_index(['품목코드', '품목명'])
-    detail_total = get_totals_with_index(detail_display, ('▶ 합계', '(TOTAL)'))
 
-    st.dataframe(style_financial_df(detail_display, diff_cols, text_cols), use_container_width=True, column_config=col_config_dtl)
-    st.dataframe(style_financial_df(detail_total, diff_cols, text_cols, is_total=True), use_container_width=True, column_config=col_config_dtl)
+    n_pages = max(1, -(-len(detail_df) // page_size))
+    page_key = f"{tab_id}_page"
+    if st.session_state.get(page_key, 1) > n_pages: st.session_state[page_key] = 1
+    page = st.number_input(f"페이지 (총 {n_pages:,})", min_value=1, max_value=n_pages, step=1, key=page_key)
+    start = (page - 1) * page_size
+    page_df = detail_df.iloc[start:start + page_size]
+    st.caption(f"총 {len(detail_df):,}개 품목 중 {min(start + 1, len(detail_df)):,}~{start + len(page_df):,}번째 표시")
+
+    col_config_dtl = get_column_config(detail_df.columns, text_cols, number_format=DETAIL_NUMBER_FORMAT)
+
+    # [틀 고정] 품목코드, 품목명을 Multi-Index로 세팅 (합계는 필터된 전체 품목 기준)
+    detail_display = page_df.set_index(['품목코드', '품목명'])
+    detail_total = get_totals_with_index(detail_df.set_index(['품목코드', '품목명']), ('▶ 합계', '(TOTAL)'))
+
+    with profiler.stage('styler_render', rows=len(detail_display)):
+        st.dataframe(style_variance_colors(detail_display, diff_cols), use_container_width=True, column_config=col_config_dtl)
+        st.dataframe(style_variance_colors(detail_total, diff_cols, is_total=True), use_container_width=True, column_config=col_config_dtl)
+
+# 월별 추이 차트: 금액(선, 왼쪽 축) + 전월/전년 동월 대비 증감(막대, 오른쪽 축), 자료가 없는 월은 비워 표시
+def build_trend_figure(series, title):
+    fig = make_subplots(specs=[[{"secondary_y": True}]])
+    fig.add_trace(go.Bar(x=series.index, y=series['전월대비'], name='전월대비', marker_color='#90CAF9'), secondary_y=True)
+    fig.add_trace(go.Bar(x=series.index, y=series['전년동월대비'], name='전년동월대비', marker_color='#FFCC80'), secondary_y=True)
+    fig.add_trace(go.Scatter(x=series.index, y=series['금액'], name='금액', mode='lines+markers',
+                             line=dict(color='#263238', width=3)), secondary_y=False)
+    fig.update_layout(title=title, barmode='group', hovermode='x unified', height=450,
+                      legend=dict(orientation='h', yanchor='bottom', y=1.02, xanchor='right', x=1),
+                      margin=dict(l=10, r=10, t=60, b=10))
+    fig.update_xaxes(type='category')
+    fig.update_yaxes(tickformat=',.0f', title_text='금액', secondary_y=False)
+    fig.update_yaxes(tickformat=',.0f', title_text='증감', showgrid=False, secondary_y=True)
+    return fig
 
 # 2. 사이드바 설정
+ANALYSIS_MODES = ["기준월 증감 분석", "월별 추이 분석"]
+TREND_WINDOW_RANGE = (12, 24)  # 월별 추이 분석 기간 (개월)
+
 with st.sidebar:
+    analysis_mode = st.radio("🧭 분석 모드", options=ANALYSIS_MODES, horizontal=True,
+                             help="월별 추이 분석은 기준 월까지 최근 12~24개월의 월별 원가수불부로 전월/전년 동월 대비 증감 추이를 봅니다.")
+    trend_mode = analysis_mode == ANALYSIS_MODES[1]
     st.header("📅 분석 기준 설정")
     target_year = st.number_input("기준 년도", value=2026)
     X = st.selectbox("기준 월(X)", options=list(range(1, 13)), index=0)
     prev_X = X - 1 if X > 1 else 12
     st.divider()
-    st.subheader("📁 1. 원가수불부(ERP10) 파일 업로드")
-    st.caption("💡 '원가수불부' 메뉴에서 다운받은 실제원가수불(EXCEL) 자료를 업로드하세요.")
-    f_curr_m = st.file_uploader(f"(1) 당월 ({X}월)", type=['csv', 'xlsx'])
-    f_prev_m = st.file_uploader(f"(2) 전월 ({prev_X}월)", type=['csv', 'xlsx'])
-    f_curr_ytd = st.file_uploader(f"(3) 당기 누적 (1월~{X}월)", type=['csv', 'xlsx'])
-    f_prev_ytd = st.file_uploader(f"(4) 전기 동기 누적 (전기 1월~{X}월)", type=['csv', 'xlsx'])
-    f_prev_full = st.file_uploader(f"(5) 전기 전체 (전기 1월~12월)", type=['csv', 'xlsx'])
+    ledger_store = get_ledger_store()
+    if trend_mode:
+        trend_window = st.slider("추이 기간 (개월)", min_value=TREND_WINDOW_RANGE[0], max_value=TREND_WINDOW_RANGE[1],
+                                 value=TREND_WINDOW_RANGE[1])
+        # 표시 기간 앞의 TREND_BASE_MONTHS 개월은 전년 동월 대비 증감의 비교 기준으로만 사용
+        trend_months = trailing_months(target_year, X, trend_window + TREND_BASE_MONTHS)
+        display_months = trend_months[TREND_BASE_MONTHS:]
+        st.subheader("📁 1. 월별 원가수불부(ERP10) 파일 업로드")
+        st.caption("💡 월별 실제원가수불(한 달치) 자료를 한꺼번에 올리세요. 파일명에 년월(예: 2026-03, 202603)이 있어야 합니다.")
+        st.caption(f"📆 표시 기간 {month_label(*display_months[0])} ~ {month_label(*display_months[-1])} · "
+                   f"전년 동월 비교 기준 {month_label(*trend_months[0])} ~ {month_label(*trend_months[TREND_BASE_MONTHS - 1])}")
+        trend_uploads = st.file_uploader("월별 원가수불부", type=['csv', 'xlsx'], accept_multiple_files=True)
+        use_store = st.toggle("🗄️ 올리지 않은 월은 저장소 자료 사용", value=True,
+                              help="기준월 증감 분석에서 보관한 '당월'(또는 다음 달 기준 '전월') 자료를 해당 월 자료로 사용합니다.")
+        save_to_store = st.toggle("💾 업로드한 파일을 저장소에 보관", value=True)
+
+        # 파일명으로 월 배정 (같은 월 파일이 여러 개면 마지막 파일 사용), 기간 밖 파일은 제외
+        # 배정 결과는 파일별로 표시해 잘못 인식된 월을 저장소에 보관하기 전에 확인할 수 있도록 함
+        trend_files, replaced = {}, []
+        for f in trend_uploads or []:
+            ym = parse_ledger_month(f.name)
+            if ym is None:
+                st.warning(f"⚠️ {f.name}: 파일명에서 년월(예: 2026-03, 202603, 2026년 3월)을 찾을 수 없어 제외합니다.")
+            elif ym not in trend_months:
+                st.caption(f"⏭️ {f.name}: 분석 기간 밖의 월({month_label(*ym)})이라 제외합니다.")
+            else:
+                if ym in trend_files: replaced.append(trend_files[ym].name)
+                trend_files[ym] = f
+        if trend_files:
+            with st.expander(f"📄 파일별 인식된 월 ({len(trend_files)}개월)"):
+                st.markdown("  \n".join(f"{month_label(*ym)} ← {trend_files[ym].name}" for ym in sorted(trend_files)))
+                if replaced: st.caption(f"같은 월의 이전 파일 제외: {', '.join(replaced)}")
+        trend_entries = {}
+        if use_store:
+            for ym in trend_months:
+                entry = ledger_store.find_month(*ym) if ym not in trend_files else None
+                if entry is not None: trend_entries[ym] = entry
+        if trend_entries:
+            st.caption(f"🗄️ 저장소 자료 사용: {', '.join(month_label(*ym) for ym in trend_entries)}")
+        missing_months = [ym for ym in trend_months if ym not in trend_files and ym not in trend_entries]
+        missing_display = [month_label(*ym) for ym in missing_months if ym in display_months]
+        missing_base = [month_label(*ym) for ym in missing_months if ym not in display_months]
+        if missing_display:
+            st.caption(f"📭 자료 없는 월 ({len(missing_display)}개월): {', '.join(missing_display)}")
+        if missing_base:
+            st.caption(f"📭 비교 기준 월 중 자료 없는 월 ({len(missing_base)}개월, 12개월 뒤 월의 전년 동월 대비는 비워 표시): "
+                       f"{', '.join(missing_base)}")
+    else:
+        st.subheader("📁 1. 원가수불부(ERP10) 파일 업로드")
+        st.caption("💡 '원가수불부' 메뉴에서 다운받은 실제원가수불(EXCEL) 자료를 업로드하세요.")
+        f_curr_m = st.file_uploader(f"(1) 당월 ({X}월)", type=['csv', 'xlsx'])
+        f_prev_m = st.file_uploader(f"(2) 전월 ({prev_X}월)", type=['csv', 'xlsx'])
+        f_curr_ytd = st.file_uploader(f"(3) 당기 누적 (1월~{X}월)", type=['csv', 'xlsx'])
+        f_prev_ytd = st.file_uploader(f"(4) 전기 동기 누적 (전기 1월~{X}월)", type=['csv', 'xlsx'])
+        f_prev_full = st.file_uploader(f"(5) 전기 전체 (전기 1월~12월)", type=['csv', 'xlsx'])
+        uploads = [f_curr_m, f_prev_m, f_curr_ytd, f_prev_ytd, f_prev_full]
+        use_store = st.toggle("🗄️ 올리지 않은 파일은 저장소 자료 사용", value=True,
+                              help="이전에 업로드한 원가수불부는 저장소에 보관되어, 같은 기간(예: 이번 달의 '전월' = 지난달의 '당월')을 다시 올리지 않아도 됩니다.")
+        save_to_store = st.toggle("💾 업로드한 파일을 저장소에 보관", value=True)
+        stored_entries = [ledger_store.find(target_year, X, role) if use_store and f is None else None
+                          for role, f in zip(LEDGER_ROLES, uploads)]
+        for role, entry in zip(LEDGER_ROLES, stored_entries):
+            if entry is not None:
+                st.caption(f"🗄️ {role}: 저장소 자료 사용 ({entry.year}년 {entry.month}월 기준 '{entry.role}' 파일)")
     st.divider()
     st.subheader("⚙️ 2. 커스텀 매핑 파일 (선택)")
     f_mapping = st.file_uploader("품목 그룹핑 매핑 파일", type=['csv', 'xlsx'], help="품목코드와 분석그룹 열이 있는 파일을 올리시면 일괄 적용됩니다.")
+    st.divider()
+    st.subheader("🚀 3. 처리 옵션")
+    parse_workers = st.number_input("파일 병렬 처리 수", min_value=1, max_value=8, value=min(5, os.cpu_count() or 1),
+                                    help="원가수불부 파일을 동시에 읽을 프로세스 수입니다. 1이면 순차 처리합니다.")
+    xlsx_reader = st.selectbox("엑셀 읽기 엔진", options=XLSX_READERS, index=XLSX_READERS.index(DEFAULT_XLSX_READER),
+                               help="auto는 calamine(설치된 경우)을 사용하고, 읽기에 실패하면 openpyxl로 자동 전환합니다.")
+    csv_streaming = st.toggle("대용량 CSV 분할 읽기", value=False,
+                              help=f"CSV 원가수불부를 {DEFAULT_CSV_CHUNKSIZE:,}행 단위로 읽어 품목코드별로 합산합니다. 메모리보다 큰 파일도 처리할 수 있습니다.")
+    show_diagnostics = st.toggle("🩺 진단 패널 표시", value=False,
+                                 help="단계별 소요 시간과 메모리를 사이드바 하단에 표시하고 JSON 으로 내려받을 수 있습니다.")
+    trace_memory = st.toggle("메모리 정밀 측정 (tracemalloc)", value=False, disabled=not show_diagnostics,
+                             help="단계별 최대 할당 메모리를 측정합니다. 서버 전체 처리 속도가 느려지므로 원인 분석 시에만 켜세요.")
+    # tracemalloc 은 프로세스 전체 설정: 이 세션의 선택을 세션 ID 로 등록하고, 닫힌 세션의 등록은 함께 정리
+    run_ctx = get_script_run_ctx()
+    is_active_session = runtime.get_instance().is_active_session if runtime.exists() else None
+    set_memory_tracing(run_ctx.session_id if run_ctx else 'bare', show_diagnostics and trace_memory, is_active_session)
 
 # 3. 메인 로직
-files = [f_curr_m, f_prev_m, f_curr_ytd, f_prev_ytd, f_prev_full]
-if all(f is not None for f in files):
-    dfs = [process_inventory_data(f) for f in files]
-    d_curr_m, d_prev_m, d_curr_ytd, d_prev_ytd, d_prev_full = dfs
+# 3-1. 월별 추이 분석: 업로드/저장소 월별 자료 -> 품목 x 월 행렬 (그래프 노드, 파일 조합이 같으면 재사용)
+if trend_mode:
+    uploaded_months = [ym for ym in trend_months if ym in trend_files]
+    file_hashes = {ym: file_digest(trend_files[ym]) for ym in uploaded_months}
+    with profiler.stage('store_load', files=len(trend_entries)):
+        month_dfs = {ym: load_stored_ledger(e) for ym, e in trend_entries.items()}
+
+    parsed = load_inventory_files([trend_files[ym] for ym in uploaded_months], [file_hashes[ym] for ym in uploaded_months],
+                                  max_workers=parse_workers, xlsx_reader=xlsx_reader,
+                                  csv_chunksize=DEFAULT_CSV_CHUNKSIZE if csv_streaming else None)
+    with profiler.stage('store_save'):
+        for ym, d in zip(uploaded_months, parsed):
+            if d is None: continue
+            month_dfs[ym] = d
+            if save_to_store:
+                ledger_store.save(d, ym[0], ym[1], '당월', file_hashes[ym])
+
+    month_hashes = {**{ym: e.source_hash for ym, e in trend_entries.items()}, **file_hashes}
+    dfs = [month_dfs.get(ym) for ym in trend_months]
+    display_dfs = dfs[TREND_BASE_MONTHS:]
+    if sum(d is not None for d in display_dfs) >= 2:
+        pipeline = get_trend_pipeline()
+        pipeline.profiler = profiler
+        pipeline.set_input('trend_ledgers', dfs,
+                           fingerprint=(tuple(month_hashes[ym] if ym in month_dfs else None for ym in trend_months), PARSER_VERSION))
+        pipeline.set_input('trend_months', trend_months, fingerprint=tuple(trend_months))
+        pipeline.set_input('trend_window', trend_window, fingerprint=trend_window)
+        pipeline.set_input('group_mapping', load_group_mapping(f_mapping) if f_mapping is not None else None,
+                           fingerprint=file_digest(f_mapping) if f_mapping is not None else None)
+        trend = pipeline.get('trend')
+        trend_groups = pipeline.get('trend_groups')
+        trend_totals = pipeline.get('trend_totals')
+        if show_diagnostics:
+            profiler.record_memory('trend_matrix', rows=len(trend.items), months=len(trend.months),
+                                   matrix_mb=round(trend.amounts.nbytes / 1e6, 2))
+
+        display_labels = trend.labels[TREND_BASE_MONTHS:]
+        st.subheader(f"📈 월별 추이 분석 ({display_labels[0]} ~ {display_labels[-1]})")
+        st.caption(f"품목 {len(trend.items):,}개 · 자료 {sum(d is not None for d in display_dfs)}/{trend_window}개월 "
+                   f"(비교 기준 {sum(d is not None for d in dfs[:TREND_BASE_MONTHS])}/{TREND_BASE_MONTHS}개월) "
+                   "(자료가 없는 월과 비교 대상 월이 없는 증감은 비워 표시) · 분석그룹은 매핑 파일 기준")
+
+        # 계정/분석그룹 선택은 월 합계 표 조회로 처리 (품목 x 월 행렬은 다시 집계하지 않음)
+        c1, c2, c3 = st.columns(3)
+        metric = c1.selectbox("지표", options=list(TREND_METRICS), key='trend_metric')
+        # 계정 선택지는 기준월 분석의 탭과 같은 범위 (매출원가: 반제품 제외, 재료비: 원재료/부재료)
+        account_options = ["전체"] + TREND_METRIC_ACCOUNTS[metric]
+        if st.session_state.get('trend_account') not in account_options: st.session_state['trend_account'] = "전체"
+        account = c2.selectbox("품목계정그룹", options=account_options, key='trend_account')
+        account_key = None if account == "전체" else account
+        group_options = ["전체"] + trend_group_names(trend_totals, metric, account_key)
+        if st.session_state.get('trend_group') not in group_options: st.session_state['trend_group'] = "전체"
+        group = c3.selectbox("분석그룹", options=group_options, key='trend_group')
+        group_key = None if group == "전체" else group
+
+        with profiler.stage('trend_chart', months=len(trend.months)):
+            series = trend_series(trend_totals, metric, account_key, group_key)
+            scope = " / ".join(v for v in [account_key, group_key] if v) or "전체"
+            st.plotly_chart(build_trend_figure(series, f"{metric} 월별 추이 ({scope})"), use_container_width=True)
+            series_cfg = get_column_config(series.columns, [], number_format=DETAIL_NUMBER_FORMAT)
+            st.dataframe(style_variance_colors(series, ['전월대비', '전년동월대비']), use_container_width=True, column_config=series_cfg)
 
-    if all(d is not None for d in dfs):
-        # 데이터 누락 방지: 모든 파일에서 품목 마스터 취합
-        all_items_list = []
-        for d in dfs:
-            if d is not None and not d.empty:
-                cols = [c for c in ['품목코드', '품목명', '단위', '품목계정그룹'] if c in d.columns]
-                if '품목코드' in cols:
-                    all_items_list.append(d[cols])
-        
-        all_items = pd.concat(all_items_list).drop_duplicates('품목코드')
-        
-        for col in ['품목명', '단위', '품목계정그룹']:
-            if col not in all_items.columns:
-                all_items[col] = ""
+        st.divider()
+        st.markdown("#### 🔎 품목별 증감 상위")
+        d1, d2, d3 = st.columns(3)
+        month_options = [label for label, d in zip(display_labels, display_dfs) if d is not None][::-1]
+        if st.session_state.get('trend_detail_month') not in month_options: st.session_state['trend_detail_month'] = month_options[0]
+        detail_month = d1.selectbox("기준 월", options=month_options, key='trend_detail_month')
+        sort_col = d2.selectbox("정렬 기준", options=['전월대비', '전년동월대비'], key='trend_sort',
+                                help="선택한 증감의 절대값 기준")
+        top_n = d3.selectbox("상위 품목 수", options=DETAIL_TOP_N_OPTIONS, key='trend_top_n')
+
+        with profiler.stage('trend_detail', rows=len(trend.items)):
+            detail_df = trend_items(trend, metric, trend.labels.index(detail_month), trend_groups)
+            if account_key is not None: detail_df = detail_df[detail_df['품목계정그룹'] == account_key]
+            if group_key is not None: detail_df = detail_df[detail_df['분석그룹'] == group_key]
+            detail_df = detail_df.loc[detail_df[sort_col].abs().nlargest(top_n).index]
+            if detail_df.empty:
+                st.info(f"{detail_month}의 {sort_col} 비교 대상 자료가 없습니다.")
             else:
-                all_items[col] = all_items[col].fillna("")
+                detail_display = detail_df.set_index(['품목코드', '품목명'])
+                st.dataframe(style_variance_colors(detail_display, ['전월대비', '전년동월대비']), use_container_width=True,
+                             column_config=get_column_config(detail_display.columns, ['품목계정그룹', '분석그룹'],
+                                                             number_format=DETAIL_NUMBER_FORMAT))
+    else:
+        st.info(f"💡 사이드바에서 {month_label(*display_months[0])} ~ {month_label(*display_months[-1])} 기간의 월별 원가수불부를 2개월 이상 올려주세요. "
+                f"전년 동월 대비는 {month_label(*trend_months[0])} 부터 있어야 모든 월에 표시됩니다. (저장소에 보관된 월은 생략 가능)")
+
+elif all(f is not None or e is not None for f, e in zip(uploads, stored_entries)):
+    uploaded_idx = [i for i, f in enumerate(uploads) if f is not None]
+    file_hashes = [file_digest(f) if f is not None else e.source_hash for f, e in zip(uploads, stored_entries)]
+    with profiler.stage('store_load', files=sum(e is not None for e in stored_entries)):
+        dfs = [load_stored_ledger(e) if e is not None else None for e in stored_entries]
+
+    parsed = load_inventory_files([uploads[i] for i in uploaded_idx], [file_hashes[i] for i in uploaded_idx],
+                                  max_workers=parse_workers, xlsx_reader=xlsx_reader,
+                                  csv_chunksize=DEFAULT_CSV_CHUNKSIZE if csv_streaming else None)
+    with profiler.stage('store_save'):
+        for i, d in zip(uploaded_idx, parsed):
+            dfs[i] = d
+            if d is not None and save_to_store:
+                ledger_store.save(d, target_year, X, LEDGER_ROLES[i], file_hashes[i])
 
-        all_items['분석그룹'] = all_items['품목명'].apply(lambda x: str(x).split('-')[0].strip())
-        
+    if all(d is not None for d in dfs):
+        # 의존성 그래프: 파일 조합이 같으면 품목 마스터/기간 비교/총괄 합계를 재사용하고,
+        # 분석그룹(매핑 파일·직접 수정)만 바뀌면 그룹 반영 단계만 다시 계산
+        pipeline = get_pipeline()
+        pipeline.profiler = profiler
+        pipeline.set_input('ledgers', dfs, fingerprint=(tuple(file_hashes), PARSER_VERSION))
+        all_items = pipeline.get('item_master')
+
+        groups_before_edit = all_items['분석그룹']
         if f_mapping is not None:
-            try:
-                mapping_df = pd.read_csv(f_mapping) if f_mapping.name.endswith('.csv') else pd.read_excel(f_mapping)
-                if '품목코드' in mapping_df.columns and '분석그룹' in mapping_df.columns:
-                    mapping_df['품목코드'] = mapping_df['품목코드'].astype(str).str.strip()
-                    mapping_dict = dict(zip(mapping_df['품목코드'], mapping_df['분석그룹']))
-                    all_items['분석그룹'] = all_items['품목코드'].map(mapping_dict).fillna(all_items['분석그룹'])
-            except Exception as e:
-                st.sidebar.error(f"매핑 파일 오류: {e}")
+            with profiler.stage('group_mapping'):
+                groups_before_edit = apply_group_mapping(all_items, load_group_mapping(f_mapping))
 
         with st.expander("🛠️ 품목 커스텀 그룹핑 설정 (직접 수정 가능)", expanded=False):
             st.info("아래 표의 **'분석그룹'** 열을 더블클릭하여 그룹명을 원하는 대로 수정할 수 있습니다. 수정한 내용을 다운로드해 사이드바에 업로드하면 다음 달에도 자동 반영됩니다.")
             col1, col2 = st.columns([8, 2])
-            edited_items = st.data_editor(
-                all_items[['품목계정그룹', '품목코드', '품목명', '분석그룹']],
-                column_config={"분석그룹": st.column_config.TextColumn("분석그룹 (수정)", required=True)},
-                use_container_width=True, hide_index=True
-            )
-            all_items['분석그룹'] = edited_items['분석그룹']
+            with profiler.stage('item_editor', rows=len(all_items)):
+                edited_items = st.data_editor(
+                    all_items[['품목계정그룹', '품목코드', '품목명']].assign(분석그룹=groups_before_edit.astype(str)),
+                    column_config={"분석그룹": st.column_config.TextColumn("분석그룹 (수정)", required=True)},
+                    use_container_width=True, hide_index=True
+                )
+                item_groups = edited_items['분석그룹']
+                pipeline.set_input('item_groups', item_groups, fingerprint=series_fingerprint(item_groups))
             
             with col2:
-                out_map = io.BytesIO()
-                with pd.ExcelWriter(out_map, engine='xlsxwriter') as writer:
-                    all_items[['품목계정그룹', '품목코드', '품목명', '분석그룹']].to_excel(writer, index=False)
-                st.download_button("📥 매핑 파일 저장(다운로드)", data=out_map.getvalue(), file_name="Item_Mapping.xlsx")
-
-        def agg_df(df, cols):
-            if df is None or df.empty: return pd.DataFrame(columns=['품목코드'] + cols)
-            valid_cols = [c for c in cols if c in df.columns]
-            if not valid_cols: return pd.DataFrame(columns=['품목코드'] + cols)
-            
-            df[valid_cols] = df[valid_cols].apply(pd.to_numeric, errors='coerce').fillna(0)
-            return df.groupby('품목코드')[valid_cols].sum().reset_index()
+                st.download_button("📥 매핑 파일 저장(다운로드)", data=lambda: pipeline.get('mapping_workbook'), file_name="Item_Mapping.xlsx")
 
-        d_curr_m_agg = agg_df(d_curr_m, ['생산출고_금액', '판매출고_금액', '기말재고_금액'])
-        d_prev_m_agg = agg_df(d_prev_m, ['생산출고_금액', '판매출고_금액', '기말재고_금액'])
-        d_curr_ytd_agg = agg_df(d_curr_ytd, ['생산출고_금액', '판매출고_금액'])
-        d_prev_ytd_agg = agg_df(d_prev_ytd, ['생산출고_금액', '판매출고_금액', '기말재고_금액'])
-        d_prev_full_agg = agg_df(d_prev_full, ['기말재고_금액'])
+        comp_all = pipeline.get('comparison')
+        cube = pipeline.get('summary_cube')
+        if show_diagnostics:
+            profiler.record_memory('item_master', rows=len(all_items), **frame_memory(all_items))
+            profiler.record_memory('comparison', rows=len(comp_all), **frame_memory(comp_all))
 
-        comp_all = all_items.copy()
-        
-        comp_all = comp_all.merge(d_curr_m_agg, on='품목코드', how='left')\
-                            .rename(columns={'생산출고_금액':'당월_생산출고', '판매출고_금액':'당월_판매출고', '기말재고_금액':'당월말_재고'})
-                            
-        comp_all = comp_all.merge(d_prev_m_agg, on='품목코드', how='left')\
-                            .rename(columns={'생산출고_금액':'전월_생산출고', '판매출고_금액':'전월_판매출고', '기말재고_금액':'전월말_재고'})
-                            
-        comp_all = comp_all.merge(d_curr_ytd_agg, on='품목코드', how='left')\
-                            .rename(columns={'생산출고_금액':'당기누적_생산출고', '판매출고_금액':'당기누적_판매출고'})
-                            
-        comp_all = comp_all.merge(d_prev_ytd_agg, on='품목코드', how='left')\
-                            .rename(columns={'생산출고_금액':'전기동기_생산출고', '판매출고_금액':'전기동기_판매출고', '기말재고_금액':'전기동월말_재고'})
-                            
-        comp_all = comp_all.merge(d_prev_full_agg, on='품목코드', how='left')\
-                            .rename(columns={'기말재고_금액':'전기말_재고'})
-
-        comp_all = comp_all.fillna(0)
-        
-        expected_num_cols = ['당월_생산출고', '당월_판매출고', '당월말_재고', '전월_생산출고', '전월_판매출고', '전월말_재고', 
-                             '당기누적_생산출고', '당기누적_판매출고', '전기동기_생산출고', '전기동기_판매출고', '전기동월말_재고', '전기말_재고']
-        for col in expected_num_cols:
-            if col not in comp_all.columns:
-                comp_all[col] = 0
-
-        # 차이 계산
-        comp_all['재고증감_vs전기말'] = comp_all['당월말_재고'] - comp_all['전기말_재고']
-        comp_all['재고증감_vs전기동월'] = comp_all['당월말_재고'] - comp_all['전기동월말_재고']
-        comp_all['재고증감_vs전월'] = comp_all['당월말_재고'] - comp_all['전월말_재고']
-        
-        comp_all['판매_YoY증감'] = comp_all['당기누적_판매출고'] - comp_all['전기동기_판매출고']
-        comp_all['판매_MoM증감'] = comp_all['당월_판매출고'] - comp_all['전월_판매출고']
-        comp_all['생산_YoY증감'] = comp_all['당기누적_생산출고'] - comp_all['전기동기_생산출고']
-        comp_all['생산_MoM증감'] = comp_all['당월_생산출고'] - comp_all['전월_생산출고']
-
-        groups = ['제품', '상품', '반제품', '원재료', '부재료']
+        groups = ACCOUNT_GROUPS
         st.subheader("📋 계정별 상세 차이 분석")
         btn_cols = st.columns(len(groups))
         if 'current_group' not in st.session_state: st.session_state.current_group = '제품'
@@ -307,11 +600,11 @@ if all(f is not None for f in files):
                 st.session_state.current_group = group
         
         target_group = st.session_state.current_group
-        group_df = comp_all[comp_all['품목계정그룹'] == target_group]
         
         text_cols = ['품목코드', '품목명', '단위', '품목계정그룹', '분석그룹']
 
-        if not group_df.empty:
+        # 계정/탭별 품목과 분석그룹 합계는 집계 큐브에서 조회 (전체 비교표를 다시 필터/집계하지 않음)
+        if cube.count(target_group) > 0:
             tab_names = ["🏛️ 기말재고 차이분석"]
             if target_group != '반제품': tab_names.append("💰 매출원가 차이분석")
             if target_group in ['원재료', '부재료']: tab_names.append("🛠️ 재료비 차이분석")
@@ -319,131 +612,111 @@ if all(f is not None for f in files):
             tabs = st.tabs(tab_names)
             
             with tabs[0]:
-                view1 = group_df[(group_df['전기말_재고'] != 0) | (group_df['전기동월말_재고'] != 0) | (group_df['전월말_재고'] != 0) | (group_df['당월말_재고'] != 0)].copy()
+                view1 = cube.rows(comp_all, target_group, 'inventory')
                 if not view1.empty:
-                    view1 = view1[['분석그룹', '품목코드', '품목명', '전기말_재고', '전기동월말_재고', '전월말_재고', '당월말_재고', '재고증감_vs전기말', '재고증감_vs전기동월', '재고증감_vs전월']]
-                    display_analysis_tab(view1, view1.columns.tolist(), ['재고증감_vs전기말', '재고증감_vs전기동월', '재고증감_vs전월'], text_cols, "tab_inv")
+                    value_cols1 = ['전기말_재고', '전기동월말_재고', '전월말_재고', '당월말_재고', '재고증감_vs전기말', '재고증감_vs전기동월', '재고증감_vs전월']
+                    view1 = view1[['분석그룹', '품목코드', '품목명'] + value_cols1]
+                    display_analysis_tab(view1, view1.columns.tolist(), ['재고증감_vs전기말', '재고증감_vs전기동월', '재고증감_vs전월'], text_cols, "tab_inv",
+                                         group_summary=cube.group_summary(target_group, 'inventory', value_cols1))
                 else: st.info("재고 변동 내역이 없습니다.")
 
             if target_group != '반제품':
                 with tabs[1]:
-                    view2 = group_df[(group_df['당기누적_판매출고'] != 0) | (group_df['전기동기_판매출고'] != 0) | (group_df['당월_판매출고'] != 0) | (group_df['전월_판매출고'] != 0)].copy()
+                    view2 = cube.rows(comp_all, target_group, 'cogs')
                     if not view2.empty:
-                        view2 = view2[['분석그룹', '품목코드', '품목명', '당기누적_판매출고', '전기동기_판매출고', '판매_YoY증감', '당월_판매출고', '전월_판매출고', '판매_MoM증감']]
-                        view2.columns = ['분석그룹', '품목코드', '품목명', '당기누적_매출원가', '전기누적_매출원가', '전기대비 차이증감', '당월_매출원가', '전월_매출원가', '전월대비 차이증감']
-                        display_analysis_tab(view2, view2.columns.tolist(), ['전기대비 차이증감', '전월대비 차이증감'], text_cols, "tab_cogs")
+                        value_cols2 = {'당기누적_판매출고': '당기누적_매출원가', '전기동기_판매출고': '전기누적_매출원가', '판매_YoY증감': '전기대비 차이증감',
+                                       '당월_판매출고': '당월_매출원가', '전월_판매출고': '전월_매출원가', '판매_MoM증감': '전월대비 차이증감'}
+                        view2 = view2[['분석그룹', '품목코드', '품목명'] + list(value_cols2)].rename(columns=value_cols2)
+                        display_analysis_tab(view2, view2.columns.tolist(), ['전기대비 차이증감', '전월대비 차이증감'], text_cols, "tab_cogs",
+                                             group_summary=cube.group_summary(target_group, 'cogs', value_cols2).rename(columns=value_cols2))
 
             if target_group in ['원재료', '부재료']:
                 with tabs[len(tab_names)-1]:
                     cost_label = "원재료비" if target_group == '원재료' else "부재료비"
-                    view3 = group_df[(group_df['당기누적_생산출고'] != 0) | (group_df['전기동기_생산출고'] != 0) | (group_df['당월_생산출고'] != 0) | (group_df['전월_생산출고'] != 0)].copy()
+                    view3 = cube.rows(comp_all, target_group, 'material')
                     if not view3.empty:
-                        view3 = view3[['분석그룹', '품목코드', '품목명', '당기누적_생산출고', '전기동기_생산출고', '생산_YoY증감', '당월_생산출고', '전월_생산출고', '생산_MoM증감']]
-                        view3.columns = ['분석그룹', '품목코드', '품목명', f'당기누적_{cost_label}', f'전기누적_{cost_label}', '전기대비 차이증감', f'당월_{cost_label}', f'전월_{cost_label}', '전월대비 차이증감']
-                        display_analysis_tab(view3, view3.columns.tolist(), ['전기대비 차이증감', '전월대비 차이증감'], text_cols, "tab_mat")
+                        value_cols3 = {'당기누적_생산출고': f'당기누적_{cost_label}', '전기동기_생산출고': f'전기누적_{cost_label}', '생산_YoY증감': '전기대비 차이증감',
+                                       '당월_생산출고': f'당월_{cost_label}', '전월_생산출고': f'전월_{cost_label}', '생산_MoM증감': '전월대비 차이증감'}
+                        view3 = view3[['분석그룹', '품목코드', '품목명'] + list(value_cols3)].rename(columns=value_cols3)
+                        display_analysis_tab(view3, view3.columns.tolist(), ['전기대비 차이증감', '전월대비 차이증감'], text_cols, "tab_mat",
+                                             group_summary=cube.group_summary(target_group, 'material', value_cols3).rename(columns=value_cols3))
         else:
             st.warning(f"'{target_group}' 계정에 유효한 데이터가 없습니다.")
 
         st.divider()
         st.subheader("📑 계정별 총괄 요약 보고서 (Summary Report)")
         
-        for col in ['전기말_재고', '전기동월말_재고', '전월말_재고', '당월말_재고', '재고증감_vs전기말', '재고증감_vs전기동월', '재고증감_vs전월',
-                    '당기누적_판매출고', '전기동기_판매출고', '판매_YoY증감', '당월_판매출고', '전월_판매출고', '판매_MoM증감',
-                    '당기누적_생산출고', '전기동기_생산출고', '생산_YoY증감', '당월_생산출고', '전월_생산출고', '생산_MoM증감']:
-            if col in comp_all.columns:
-                comp_all[col] = pd.to_numeric(comp_all[col], errors='coerce').fillna(0)
-
-        summary_agg = comp_all.groupby('품목계정그룹').agg({
-            '전기말_재고': 'sum', '전기동월말_재고': 'sum', '전월말_재고': 'sum', '당월말_재고': 'sum', 
-            '재고증감_vs전기말': 'sum', '재고증감_vs전기동월': 'sum', '재고증감_vs전월': 'sum',
-            '당기누적_판매출고': 'sum', '전기동기_판매출고': 'sum', '판매_YoY증감': 'sum',
-            '당월_판매출고': 'sum', '전월_판매출고': 'sum', '판매_MoM증감': 'sum',
-            '당기누적_생산출고': 'sum', '전기동기_생산출고': 'sum', '생산_YoY증감': 'sum',
-            '당월_생산출고': 'sum', '전월_생산출고': 'sum', '생산_MoM증감': 'sum'
-        }).reset_index()
-
-        summary_agg['품목계정그룹'] = pd.Categorical(summary_agg['품목계정그룹'], categories=groups, ordered=True)
-        summary_agg = summary_agg.sort_values('품목계정그룹')
-
-        summary_tabs = st.tabs(["🏛️ 기말재고 총괄", "💰 매출원가 총괄", "🛠️ 재료비 총괄"])
-
-        with summary_tabs[0]:
-            sum_view1 = summary_agg[['품목계정그룹', '전기말_재고', '전기동월말_재고', '전월말_재고', '당월말_재고', '재고증감_vs전기말', '재고증감_vs전기동월', '재고증감_vs전월']]
-            
-            # [요청 3] 품목계정그룹 열 틀 고정
-            sum_view1_display = sum_view1.set_index('품목계정그룹')
-            sum_view1_total = get_totals_with_index(sum_view1_display, '▶ 합계 (TOTAL)')
-            
-            col_cfg_sum1 = get_column_config(sum_view1.columns, text_cols)
-            
-            st.dataframe(style_financial_df(sum_view1_display, ['재고증감_vs전기말', '재고증감_vs전기동월', '재고증감_vs전월'], text_cols), use_container_width=True, column_config=col_cfg_sum1)
-            st.dataframe(style_financial_df(sum_view1_total, ['재고증감_vs전기말', '재고증감_vs전기동월', '재고증감_vs전월'], text_cols, is_total=True), use_container_width=True, column_config=col_cfg_sum1)
+        summary_agg = pipeline.get('summary')
 
-        with summary_tabs[1]:
-            s_view2 = summary_agg[summary_agg['품목계정그룹'] != '반제품']\
-                [['품목계정그룹', '당기누적_판매출고', '전기동기_판매출고', '판매_YoY증감', '당월_판매출고', '전월_판매출고', '판매_MoM증감']]
-            s_view2.columns = ['품목계정그룹', '당기누적_매출원가', '전기누적_매출원가', '전기대비 차이증감', '당월_매출원가', '전월_매출원가', '전월대비 차이증감']
+        with profiler.stage('summary_report'):
+            summary_tabs = st.tabs(["🏛️ 기말재고 총괄", "💰 매출원가 총괄", "🛠️ 재료비 총괄"])
+
+            with summary_tabs[0]:
+                sum_view1 = summary_agg[['품목계정그룹', '전기말_재고', '전기동월말_재고', '전월말_재고', '당월말_재고', '재고증감_vs전기말', '재고증감_vs전기동월', '재고증감_vs전월']]
             
-            # [요청 3] 품목계정그룹 열 틀 고정
-            s_view2_display = s_view2.set_index('품목계정그룹')
-            s_view2_total = get_totals_with_index(s_view2_display, '▶ 합계 (TOTAL)')
+                # [요청 3] 품목계정그룹 열 틀 고정
+                sum_view1_display = sum_view1.set_index('품목계정그룹')
+                sum_view1_total = get_totals_with_index(sum_view1_display, '▶ 합계 (TOTAL)')
             
-            col_cfg_sum2 = get_column_config(s_view2.columns, text_cols)
+                col_cfg_sum1 = get_column_config(sum_view1.columns, text_cols)
             
-            st.dataframe(style_financial_df(s_view2_display, ['전기대비 차이증감', '전월대비 차이증감'], text_cols), use_container_width=True, column_config=col_cfg_sum2)
-            st.dataframe(style_financial_df(s_view2_total, ['전기대비 차이증감', '전월대비 차이증감'], text_cols, is_total=True), use_container_width=True, column_config=col_cfg_sum2)
+                st.dataframe(style_financial_df(sum_view1_display, ['재고증감_vs전기말', '재고증감_vs전기동월', '재고증감_vs전월'], text_cols), use_container_width=True, column_config=col_cfg_sum1)
+                st.dataframe(style_financial_df(sum_view1_total, ['재고증감_vs전기말', '재고증감_vs전기동월', '재고증감_vs전월'], text_cols, is_total=True), use_container_width=True, column_config=col_cfg_sum1)
 
-        with summary_tabs[2]:
-            s_view3 = summary_agg[summary_agg['품목계정그룹'].isin(['원재료', '부재료'])]\
-                [['품목계정그룹', '당기누적_생산출고', '전기동기_생산출고', '생산_YoY증감', '당월_생산출고', '전월_생산출고', '생산_MoM증감']]
-            s_view3.columns = ['품목계정그룹', '당기누적_재료비', '전기누적_재료비', '전기대비 차이증감', '당월_재료비', '전월_재료비', '전월대비 차이증감']
-            
-            # [요청 3] 품목계정그룹 열 틀 고정
-            s_view3_display = s_view3.set_index('품목계정그룹')
-            s_view3_total = get_totals_with_index(s_view3_display, '▶ 합계 (TOTAL)')
+            with summary_tabs[1]:
+                s_view2 = summary_agg[summary_agg['품목계정그룹'] != '반제품']\
+                    [['품목계정그룹', '당기누적_판매출고', '전기동기_판매출고', '판매_YoY증감', '당월_판매출고', '전월_판매출고', '판매_MoM증감']]
+                s_view2.columns = ['품목계정그룹', '당기누적_매출원가', '전기누적_매출원가', '전기대비 차이증감', '당월_매출원가', '전월_매출원가', '전월대비 차이증감']
             
-            col_cfg_sum3 = get_column_config(s_view3.columns, text_cols)
+                # [요청 3] 품목계정그룹 열 틀 고정
+                s_view2_display = s_view2.set_index('품목계정그룹')
+                s_view2_total = get_totals_with_index(s_view2_display, '▶ 합계 (TOTAL)')
             
-            st.dataframe(style_financial_df(s_view3_display, ['전기대비 차이증감', '전월대비 차이증감'], text_cols), use_container_width=True, column_config=col_cfg_sum3)
-            st.dataframe(style_financial_df(s_view3_total, ['전기대비 차이증감', '전월대비 차이증감'], text_cols, is_total=True), use_container_width=True, column_config=col_cfg_sum3)
-
-        # 엑셀 다운로드 (엑셀은 틀고정용 인덱스가 아닌 일반 열로 출력되도록 별도 함수 사용)
-        output = io.BytesIO()
-        with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-            export_inv = summary_agg[['품목계정그룹', '전기말_재고', '전기동월말_재고', '전월말_재고', '당월말_재고', '재고증감_vs전기말', '재고증감_vs전기동월', '재고증감_vs전월']].copy()
-            export_inv = append_total_for_excel(export_inv, label_col='품목계정그룹')
-            export_inv.to_excel(writer, index=False, sheet_name='기말재고_총괄')
-
-            export_cogs = summary_agg[summary_agg['품목계정그룹'] != '반제품'][['품목계정그룹', '당기누적_판매출고', '전기동기_판매출고', '판매_YoY증감', '당월_판매출고', '전월_판매출고', '판매_MoM증감']].copy()
-            export_cogs.columns = ['품목계정그룹', '당기누적_매출원가', '전기누적_매출원가', '전기대비_차이증감', '당월_매출원가', '전월_매출원가', '전월대비_차이증감']
-            export_cogs = append_total_for_excel(export_cogs, label_col='품목계정그룹')
-            export_cogs.to_excel(writer, index=False, sheet_name='매출원가_총괄')
-
-            export_mat = summary_agg[summary_agg['품목계정그룹'].isin(['원재료', '부재료'])][['품목계정그룹', '당기누적_생산출고', '전기동기_생산출고', '생산_YoY증감', '당월_생산출고', '전월_생산출고', '생산_MoM증감']].copy()
-            export_mat.columns = ['품목계정그룹', '당기누적_재료비', '전기누적_재료비', '전기대비_차이증감', '당월_재료비', '전월_재료비', '전월대비_차이증감']
-            export_mat = append_total_for_excel(export_mat, label_col='품목계정그룹')
-            export_mat.to_excel(writer, index=False, sheet_name='재료비_총괄')
-
-            export_detail = comp_all.copy()
-            export_detail['품목계정그룹'] = pd.Categorical(export_detail['품목계정그룹'], categories=groups, ordered=True)
-            export_detail = export_detail.sort_values(['품목계정그룹', '분석그룹', '품목코드'])
+                col_cfg_sum2 = get_column_config(s_view2.columns, text_cols)
             
-            export_detail = export_detail[(export_detail[['전기말_재고', '전기동월말_재고', '전월말_재고', '당월말_재고', '당기누적_판매출고', '전기동기_판매출고', '당월_판매출고', '전월_판매출고', '당기누적_생산출고', '전기동기_생산출고', '당월_생산출고', '전월_생산출고']] != 0).any(axis=1)]
+                st.dataframe(style_financial_df(s_view2_display, ['전기대비 차이증감', '전월대비 차이증감'], text_cols), use_container_width=True, column_config=col_cfg_sum2)
+                st.dataframe(style_financial_df(s_view2_total, ['전기대비 차이증감', '전월대비 차이증감'], text_cols, is_total=True), use_container_width=True, column_config=col_cfg_sum2)
+
+            with summary_tabs[2]:
+                s_view3 = summary_agg[summary_agg['품목계정그룹'].isin(['원재료', '부재료'])]\
+                    [['품목계정그룹', '당기누적_생산출고', '전기동기_생산출고', '생산_YoY증감', '당월_생산출고', '전월_생산출고', '생산_MoM증감']]
+                s_view3.columns = ['품목계정그룹', '당기누적_재료비', '전기누적_재료비', '전기대비 차이증감', '당월_재료비', '전월_재료비', '전월대비 차이증감']
             
-            export_detail.rename(columns={
-                '판매_YoY증감': '매출원가_전기대비증감', '판매_MoM증감': '매출원가_전월대비증감',
-                '생산_YoY증감': '재료비_전기대비증감', '생산_MoM증감': '재료비_전월대비증감',
-                '당기누적_판매출고': '당기누적_매출원가', '전기동기_판매출고': '전기누적_매출원가', '당월_판매출고': '당월_매출원가', '전월_판매출고': '전월_매출원가',
-                '당기누적_생산출고': '당기누적_재료비', '전기동기_생산출고': '전기누적_재료비', '당월_생산출고': '당월_재료비', '전월_생산출고': '전월_재료비'
-            }, inplace=True)
+                # [요청 3] 품목계정그룹 열 틀 고정
+                s_view3_display = s_view3.set_index('품목계정그룹')
+                s_view3_total = get_totals_with_index(s_view3_display, '▶ 합계 (TOTAL)')
             
-            detail_cols = ['분석그룹', '품목계정그룹', '품목코드', '품목명', '단위', 
-                           '전기말_재고', '전기동월말_재고', '전월말_재고', '당월말_재고', '재고증감_vs전기말', '재고증감_vs전기동월', '재고증감_vs전월',
-                           '당기누적_매출원가', '전기누적_매출원가', '매출원가_전기대비증감', '당월_매출원가', '전월_매출원가', '매출원가_전월대비증감',
-                           '당기누적_재료비', '전기누적_재료비', '재료비_전기대비증감', '당월_재료비', '전월_재료비', '재료비_전월대비증감']
+                col_cfg_sum3 = get_column_config(s_view3.columns, text_cols)
             
-            export_detail[detail_cols].to_excel(writer, index=False, sheet_name='품목별_상세분석')
+                st.dataframe(style_financial_df(s_view3_display, ['전기대비 차이증감', '전월대비 차이증감'], text_cols), use_container_width=True, column_config=col_cfg_sum3)
+                st.dataframe(style_financial_df(s_view3_total, ['전기대비 차이증감', '전월대비 차이증감'], text_cols, is_total=True), use_container_width=True, column_config=col_cfg_sum3)
 
-        st.download_button("📥 전체 분석 데이터 다운로드", data=output.getvalue(), file_name=f"Inventory_Analysis_{X}M.xlsx")
+        # 엑셀 다운로드: 버튼을 눌렀을 때만 워크북을 생성하고, 입력(파일/분석그룹)이 같으면 재사용
+        st.download_button("📥 전체 분석 데이터 다운로드", data=lambda: pipeline.get('analysis_workbook'), file_name=f"Inventory_Analysis_{X}M.xlsx")
 else:
-    st.info("💡 사이드바의 1번(원가수불부 5개 파일) 항목을 모두 업로드해주세요.")
+    st.info("💡 사이드바의 1번(원가수불부 5개 파일) 항목을 모두 업로드해주세요. (저장소에 보관된 기간은 생략 가능)")
+
+# 4. 진단 패널: 이번 실행의 단계별 시간/메모리 + 최근 실행 기록 JSON 다운로드
+# 엑셀 다운로드처럼 버튼 클릭 시 계산되는 단계는 해당 실행 기록에 나중에 추가됨
+diagnostics_runs = st.session_state.setdefault('diagnostics_runs', [])
+diagnostics_runs.append(profiler)
+del diagnostics_runs[:-DIAGNOSTICS_HISTORY]
+
+if show_diagnostics:
+    with st.sidebar:
+        st.divider()
+        st.subheader("🩺 진단 (단계별 시간/메모리)")
+        rss = current_rss()
+        st.caption(f"이번 실행 {profiler.total_seconds():.2f}초" + (f" · 프로세스 메모리 {rss / 1e6:,.0f} MB" if rss else ""))
+        if profiler.stages:
+            stage_df = pd.DataFrame(profiler.stages)
+            stage_df['stage'] = ['  ' * d + name for d, name in zip(stage_df['depth'], stage_df['stage'])]
+            st.dataframe(stage_df.drop(columns=['depth']), hide_index=True, use_container_width=True)
+        if profiler.memory:
+            # compact_mb: 현재 표현(category 포함), plain_mb: category 열을 일반 문자열로 둔 경우
+            st.caption("표 메모리 (MB)")
+            st.dataframe(pd.DataFrame(profiler.memory).T, use_container_width=True)
+        past = [f"{p.started_at[11:]} {p.total_seconds():.2f}s" for p in reversed(diagnostics_runs[:-1])][:5]
+        if past: st.caption("이전 실행: " + " | ".join(past))
+        st.download_button("📥 진단 기록(JSON) 다운로드", data=lambda: dump_profiles(diagnostics_runs),
+                           file_name="diagnostics.json", mime="application/json")
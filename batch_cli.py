@@ -0,0 +1,153 @@
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from inventory_engine import (DEFAULT_CSV_CHUNKSIZE, DEFAULT_XLSX_READER, XLSX_READERS, build_analysis_workbook, process_inventory_data,
+                              read_group_mapping, run_analysis)
+from ledger_store import LEDGER_ROLES
+
+# 여러 법인/공장 x 월의 기말재고·매출원가·재료비 증감 분석을 브라우저 없이 일괄 실행
+#
+# 사용법
+#   python batch_cli.py --manifest jobs.json --out output/ --workers 4
+#   python batch_cli.py --dir ledgers/ --out output/
+#   python batch_cli.py --dir ledgers/ --csv-chunksize 200000   (메모리보다 큰 CSV 원가수불부)
+#
+# manifest(JSON): 작업 목록, 파일 경로는 manifest 위치 기준 상대 경로 허용
+#   [{"entity": "1공장", "year": 2026, "month": 3,
+#     "files": {"당월": "...", "전월": "...", "당기누적": "...", "전기동기": "...", "전기전체": "..."},
+#     "mapping": "mapping.xlsx"}]
+# 디렉터리: {dir}/{법인}/{년도}-{월}/ 아래에 당월.xlsx, 전월.xlsx, 당기누적.xlsx, 전기동기.xlsx,
+#   전기전체.xlsx (csv 가능) 와 선택적으로 매핑.xlsx 를 둠
+#
+# 결과: {out}/{법인}/{년도}/Inventory_Analysis_{월}M.xlsx (Streamlit 앱의 다운로드 파일과 동일)
+
+MAPPING_NAMES = ['매핑', 'mapping']
+LEDGER_EXTENSIONS = ['.xlsx', '.csv']
+
+
+def _find_file(folder, stems):
+    for stem in stems:
+        for ext in LEDGER_EXTENSIONS:
+            path = os.path.join(folder, stem + ext)
+            if os.path.exists(path): return path
+    return None
+
+
+def jobs_from_dir(root):
+    jobs = []
+    for entity in sorted(os.listdir(root)):
+        entity_dir = os.path.join(root, entity)
+        if not os.path.isdir(entity_dir): continue
+        for period in sorted(os.listdir(entity_dir)):
+            period_dir = os.path.join(entity_dir, period)
+            if not os.path.isdir(period_dir): continue
+            try:
+                year, month = (int(v) for v in period.split('-'))
+            except ValueError:
+                continue
+            jobs.append({
+                'entity': entity, 'year': year, 'month': month,
+                'files': {role: _find_file(period_dir, [role]) for role in LEDGER_ROLES},
+                'mapping': _find_file(period_dir, MAPPING_NAMES),
+            })
+    return jobs
+
+
+def jobs_from_manifest(path):
+    with open(path, encoding='utf-8') as f:
+        jobs = json.load(f)
+    base = os.path.dirname(os.path.abspath(path))
+
+    def resolve(p):
+        return p if p is None or os.path.isabs(p) else os.path.join(base, p)
+
+    for job in jobs:
+        job['files'] = {role: resolve(job.get('files', {}).get(role)) for role in LEDGER_ROLES}
+        job['mapping'] = resolve(job.get('mapping'))
+    return jobs
+
+
+def job_label(job):
+    return f"{job['entity']} {job['year']}-{int(job['month']):02d}"
+
+
+# 작업 1건 실행 (프로세스 풀 워커): 결과 파일 경로와 단계별 소요 시간을 반환
+def run_job(job, out_dir, xlsx_reader=DEFAULT_XLSX_READER, csv_chunksize=None):
+    timings = {}
+    missing = [role for role in LEDGER_ROLES if not job['files'].get(role)]
+    if missing:
+        raise FileNotFoundError(f"원가수불부 파일 누락: {', '.join(missing)}")
+
+    t = time.perf_counter()
+    dfs = []
+    for role in LEDGER_ROLES:
+        path = job['files'][role]
+        with open(path, 'rb') as f:
+            dfs.append(process_inventory_data(f, path, xlsx_reader=xlsx_reader, csv_chunksize=csv_chunksize))
+    mapping_dict = None
+    if job.get('mapping'):
+        with open(job['mapping'], 'rb') as f:
+            mapping_dict = read_group_mapping(f, job['mapping'])
+    timings['parse'] = time.perf_counter() - t
+
+    t = time.perf_counter()
+    comp_all, summary_agg = run_analysis(dfs, mapping_dict)
+    timings['analysis'] = time.perf_counter() - t
+
+    t = time.perf_counter()
+    workbook = build_analysis_workbook(summary_agg, comp_all)
+    target_dir = os.path.join(out_dir, str(job['entity']), str(job['year']))
+    os.makedirs(target_dir, exist_ok=True)
+    out_path = os.path.join(target_dir, f"Inventory_Analysis_{int(job['month'])}M.xlsx")
+    with open(out_path, 'wb') as f:
+        f.write(workbook)
+    timings['export'] = time.perf_counter() - t
+
+    return out_path, len(comp_all), timings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="원가수불부 증감 분석 일괄 실행")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--manifest', help="작업 목록 JSON 파일")
+    source.add_argument('--dir', help="{법인}/{년도}-{월}/ 구조의 원가수불부 폴더")
+    parser.add_argument('--out', default='output', help="결과 엑셀 저장 폴더")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="동시에 실행할 작업 수")
+    parser.add_argument('--xlsx-reader', choices=XLSX_READERS, default=DEFAULT_XLSX_READER)
+    parser.add_argument('--csv-chunksize', type=int, nargs='?', const=DEFAULT_CSV_CHUNKSIZE, default=None,
+                        help=f"CSV 를 지정한 행 수 단위로 나눠 읽고 품목코드별로 합산 (값 생략 시 {DEFAULT_CSV_CHUNKSIZE:,}행)")
+    args = parser.parse_args(argv)
+
+    jobs = jobs_from_manifest(args.manifest) if args.manifest else jobs_from_dir(args.dir)
+    if not jobs:
+        print("실행할 작업이 없습니다.", file=sys.stderr)
+        return 1
+
+    print(f"작업 {len(jobs)}건, 동시 실행 {min(args.workers, len(jobs))}개")
+    started = time.perf_counter()
+    failed = 0
+    with ProcessPoolExecutor(max_workers=max(1, min(args.workers, len(jobs))),
+                             mp_context=multiprocessing.get_context('spawn')) as pool:
+        futures = {pool.submit(run_job, job, args.out, args.xlsx_reader, args.csv_chunksize): job for job in jobs}
+        for future in as_completed(futures):
+            label = job_label(futures[future])
+            try:
+                out_path, n_items, timings = future.result()
+            except Exception as e:
+                failed += 1
+                print(f"[실패] {label}: {e}", file=sys.stderr)
+                continue
+            detail = ', '.join(f"{k} {v:.2f}s" for k, v in timings.items())
+            print(f"[완료] {label}: 품목 {n_items:,}개, {sum(timings.values()):.2f}s ({detail}) -> {out_path}")
+
+    print(f"전체 {time.perf_counter() - started:.2f}s, 성공 {len(jobs) - failed}건 / 실패 {failed}건")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
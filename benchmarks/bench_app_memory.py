@@ -0,0 +1,73 @@
+import argparse
+import io
+import os
+import runpy
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# app.py 전체 실행(5개 파일 파싱 -> 기간 비교 -> 화면 구성 -> 엑셀 생성)의 최대 메모리/시간 측정
+# Streamlit bare 모드로 실행하며 파일 업로드 위젯은 합성 원가수불부로 대체
+# 사용법: python benchmarks/bench_app_memory.py --items 10000
+#   변경 전후 비교: git worktree add /tmp/before <이전 커밋> 후
+#                   python benchmarks/bench_app_memory.py --repo /tmp/before
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class _Upload(io.BytesIO):
+    def __init__(self, data, name):
+        super().__init__(data)
+        self.name = name
+        self.file_id = name
+
+
+# app.py 를 한 번 실행 (업로드 라벨 '(1) 당월 ...' ~ '(5) 전기 전체 ...' 의 번호로 파일을 돌려줌, 매핑 파일은 없음)
+def run_app(repo, payloads, fmt):
+    import streamlit as st
+
+    def fake_uploader(label, *a, **k):
+        if not label.startswith('('): return None
+        i = int(label[1]) - 1
+        return _Upload(payloads[i], f"ledger_{i + 1}.{fmt}")
+
+    st.file_uploader = fake_uploader
+    st.sidebar.file_uploader = fake_uploader
+
+    cwd = os.getcwd()
+    os.chdir(repo)
+    try:
+        return runpy.run_path(os.path.join(repo, 'app.py'), run_name='__main__')
+    finally:
+        os.chdir(cwd)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--items', type=int, default=10000)
+    parser.add_argument('--fmt', choices=['csv', 'xlsx'], default='csv')
+    parser.add_argument('--repo', default=os.path.dirname(BENCH_DIR), help="측정할 app.py 가 있는 디렉터리")
+    args = parser.parse_args()
+
+    repo = os.path.abspath(args.repo)
+    sys.path[:0] = [repo, BENCH_DIR]
+    os.environ.setdefault('LEDGER_STORE_DIR', tempfile.mkdtemp(prefix='ledger_store_'))
+
+    from synthetic_erp10 import ledger_bytes
+
+    payloads = [ledger_bytes(args.items, seed=i, fmt=args.fmt) for i in range(5)]
+
+    tracemalloc.start()
+    t = time.perf_counter()
+    run_app(repo, payloads, args.fmt)
+    elapsed = time.perf_counter() - t
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"{repo}/app.py  품목 {args.items:,}행 x 5 ({args.fmt})")
+    print(f"전체 실행 {elapsed:.2f}s, 최대 메모리 {peak / 1e6:.1f} MB (tracemalloc)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+import argparse
+import io
+import os
+import sys
+import time
+import tracemalloc
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from inventory_engine import AMOUNT_COLUMNS, MASTER_COLUMNS, process_inventory_data, run_analysis  # noqa: E402
+from synthetic_erp10 import ledger_bytes, make_ledger_frame  # noqa: E402
+
+# 열 projection + 콤마 인식 숫자 변환 전/후의 process_inventory_data 시간·메모리 비교
+# 사용법: python benchmarks/bench_ingest.py --rows 100000 --fmt csv
+# csv 는 분할 읽기(csv_chunksize) 결과로 만든 비교표가 한 번에 읽은 결과와 같은지도 확인
+
+
+# 변경 전 전처리 경로 (전체 열 보관, 모든 수량/금액 열을 str 로 변환 후 콤마 제거)
+def legacy_process_inventory_data(file, file_name):
+    df_raw = pd.read_csv(file, header=None) if file_name.endswith('.csv') else pd.read_excel(file, header=None)
+    header_main = df_raw.iloc[0].ffill()
+    header_sub = df_raw.iloc[1].fillna('')
+    new_cols = []
+    for m, s in zip(header_main, header_sub):
+        col_name = f"{m}_{s}".strip("_") if s != '' else str(m)
+        new_cols.append(col_name)
+    df = df_raw.iloc[2:].copy()
+    df.columns = new_cols
+
+    # pandas 3 의 str dtype 은 astype(str) 후에도 빈 칸이 NaN 으로 남으므로 fillna 로 pandas 2 의 'nan' -> '' 동작을 재현
+    for col in ['품목계정그룹', '품목코드', '품목명', '단위']:
+        if col in df.columns:
+            df[col] = df[col].fillna('').astype(str).str.strip().replace('nan', '')
+
+    df['품목계정그룹'] = df['품목계정그룹'].replace('제품(OEM)', '제품')
+    df = df[df['품목코드'] != '']
+
+    numeric_cols = [c for c in df.columns if '수량' in c or '금액' in c]
+    for col in numeric_cols:
+        df[col] = pd.to_numeric(df[col].astype(str).str.replace(',', ''), errors='coerce').fillna(0)
+    return df
+
+
+def measure(func, raw, file_name):
+    # tracemalloc 추적 비용이 시간 측정에 섞이지 않도록 시간과 메모리는 따로 측정
+    t = time.perf_counter()
+    df = func(io.BytesIO(raw), file_name)
+    elapsed = time.perf_counter() - t
+
+    tracemalloc.start()
+    func(io.BytesIO(raw), file_name)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return df, elapsed, peak
+
+
+# 분할 읽기 확인용 CSV: 빈 품목코드(소계) 행, 품목명이 빈 칸인 행이 먼저 나오고 chunk 를 넘어 반복되는 품목코드 포함
+def check_chunked(n_rows):
+    frame = make_ledger_frame(n_rows)
+    header, body = frame.iloc[:2], frame.iloc[2:]
+    repeats = body.iloc[:10].copy()
+    repeats[2] = None  # 품목명
+    blank_code = body.iloc[10:11].copy()
+    blank_code[1] = None  # 품목코드
+    mid = len(body) // 2
+    raw = pd.concat([header, repeats, body.iloc[:mid], blank_code, body.iloc[mid:]])\
+        .to_csv(index=False, header=False).encode()
+
+    whole = process_inventory_data(io.BytesIO(raw), 'check.csv')
+    chunked = process_inventory_data(io.BytesIO(raw), 'check.csv', csv_chunksize=max(1, n_rows // 4))
+    pd.testing.assert_frame_equal(run_analysis([whole] * 5)[0], run_analysis([chunked] * 5)[0])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--fmt', choices=['csv', 'xlsx'], default='csv')
+    args = parser.parse_args()
+
+    file_name = f'bench.{args.fmt}'
+    raw = ledger_bytes(args.rows, fmt=args.fmt)
+    print(f"합성 원가수불부 {args.rows:,}행 ({args.fmt}, {len(raw) / 1e6:.1f} MB)")
+
+    legacy, t_old, m_old = measure(legacy_process_inventory_data, raw, file_name)
+    projected, t_new, m_new = measure(lambda f, n: process_inventory_data(f, n, xlsx_reader='openpyxl'), raw, file_name)
+
+    cols = MASTER_COLUMNS + AMOUNT_COLUMNS
+    pd.testing.assert_frame_equal(legacy[cols].reset_index(drop=True), projected[cols].reset_index(drop=True), check_dtype=False)
+
+    print(f"{'':<10}{'시간(s)':>10}{'최대 메모리(MB)':>18}{'결과 메모리(MB)':>18}")
+    for label, df, t, m in [('변경 전', legacy, t_old, m_old), ('변경 후', projected, t_new, m_new)]:
+        print(f"{label:<10}{t:>10.2f}{m / 1e6:>18.1f}{df.memory_usage(deep=True).sum() / 1e6:>18.1f}")
+    print("분석 대상 열 결과 일치: OK")
+
+    if args.fmt == 'csv':
+        check_chunked(min(args.rows, 20000))
+        print("분할 읽기 비교표 일치 (빈 품목코드/품목명 포함): OK")
+
+
+if __name__ == '__main__':
+    main()
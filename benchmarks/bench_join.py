@@ -0,0 +1,86 @@
+import argparse
+import io
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from inventory_engine import aggregate_periods, build_comparison, build_item_index, process_inventory_data  # noqa: E402
+from synthetic_erp10 import ledger_bytes  # noqa: E402
+
+# 5단계 merge 체인(변경 전)과 품목 ID 기반 기간 비교 엔진(변경 후)의 소요 시간 비교 및 결과 일치 확인
+# 사용법: python benchmarks/bench_join.py --items 200000
+
+
+def legacy_comparison(all_items, dfs):
+    def agg_df(df, cols):
+        if df is None or df.empty: return pd.DataFrame(columns=['품목코드'] + cols)
+        valid_cols = [c for c in cols if c in df.columns]
+        if not valid_cols: return pd.DataFrame(columns=['품목코드'] + cols)
+        df[valid_cols] = df[valid_cols].apply(pd.to_numeric, errors='coerce').fillna(0)
+        return df.groupby('품목코드')[valid_cols].sum().reset_index()
+
+    d_curr_m, d_prev_m, d_curr_ytd, d_prev_ytd, d_prev_full = [d.copy() for d in dfs]
+    d_curr_m_agg = agg_df(d_curr_m, ['생산출고_금액', '판매출고_금액', '기말재고_금액'])
+    d_prev_m_agg = agg_df(d_prev_m, ['생산출고_금액', '판매출고_금액', '기말재고_금액'])
+    d_curr_ytd_agg = agg_df(d_curr_ytd, ['생산출고_금액', '판매출고_금액'])
+    d_prev_ytd_agg = agg_df(d_prev_ytd, ['생산출고_금액', '판매출고_금액', '기말재고_금액'])
+    d_prev_full_agg = agg_df(d_prev_full, ['기말재고_금액'])
+
+    comp_all = all_items.copy()
+    comp_all = comp_all.merge(d_curr_m_agg, on='품목코드', how='left')\
+                        .rename(columns={'생산출고_금액': '당월_생산출고', '판매출고_금액': '당월_판매출고', '기말재고_금액': '당월말_재고'})
+    comp_all = comp_all.merge(d_prev_m_agg, on='품목코드', how='left')\
+                        .rename(columns={'생산출고_금액': '전월_생산출고', '판매출고_금액': '전월_판매출고', '기말재고_금액': '전월말_재고'})
+    comp_all = comp_all.merge(d_curr_ytd_agg, on='품목코드', how='left')\
+                        .rename(columns={'생산출고_금액': '당기누적_생산출고', '판매출고_금액': '당기누적_판매출고'})
+    comp_all = comp_all.merge(d_prev_ytd_agg, on='품목코드', how='left')\
+                        .rename(columns={'생산출고_금액': '전기동기_생산출고', '판매출고_금액': '전기동기_판매출고', '기말재고_금액': '전기동월말_재고'})
+    comp_all = comp_all.merge(d_prev_full_agg, on='품목코드', how='left')\
+                        .rename(columns={'기말재고_금액': '전기말_재고'})
+    comp_all = comp_all.fillna(0)
+
+    comp_all['재고증감_vs전기말'] = comp_all['당월말_재고'] - comp_all['전기말_재고']
+    comp_all['재고증감_vs전기동월'] = comp_all['당월말_재고'] - comp_all['전기동월말_재고']
+    comp_all['재고증감_vs전월'] = comp_all['당월말_재고'] - comp_all['전월말_재고']
+    comp_all['판매_YoY증감'] = comp_all['당기누적_판매출고'] - comp_all['전기동기_판매출고']
+    comp_all['판매_MoM증감'] = comp_all['당월_판매출고'] - comp_all['전월_판매출고']
+    comp_all['생산_YoY증감'] = comp_all['당기누적_생산출고'] - comp_all['전기동기_생산출고']
+    comp_all['생산_MoM증감'] = comp_all['당월_생산출고'] - comp_all['전월_생산출고']
+    return comp_all
+
+
+def best_of(func, repeat):
+    times, result = [], None
+    for _ in range(repeat):
+        t = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - t)
+    return result, min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--items', type=int, default=200000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    dfs = [process_inventory_data(io.BytesIO(ledger_bytes(args.items, seed=i, fmt='csv')), 'bench.csv') for i in range(5)]
+    item_index = build_item_index(dfs)
+    all_items = item_index.items
+    print(f"기간별 {args.items:,}행 x 5, 전체 품목코드 {len(all_items):,}개")
+
+    legacy, t_old = best_of(lambda: legacy_comparison(all_items, dfs), args.repeat)
+    engine, t_new = best_of(lambda: build_comparison(all_items, aggregate_periods(dfs, item_index)), args.repeat)
+
+    pd.testing.assert_frame_equal(legacy, engine[legacy.columns], check_dtype=False)
+    print(f"merge 체인(변경 전)   {t_old:7.2f}s")
+    print(f"품목 ID 결합(변경 후) {t_new:7.2f}s")
+    print("결과 일치: OK")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,214 @@
+import argparse
+import gc
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path[:0] = [REPO_DIR, BENCH_DIR]
+
+from inventory_engine import (DEFAULT_CSV_CHUNKSIZE, aggregate_periods, apply_group_mapping,  # noqa: E402
+                              build_analysis_workbook, build_comparison, build_item_index, process_inventory_data,
+                              summarize_by_account)
+from synthetic_erp10 import write_period_ledgers  # noqa: E402
+
+# 분석 파이프라인 단계별 시간/최대 메모리 벤치마크 (합성 원가수불부 5개 기간)
+# 사용법
+#   python benchmarks/bench_pipeline.py                          (1천/1만/10만/100만 품목)
+#   python benchmarks/bench_pipeline.py --sizes 1000 10000 --stages parse comparison
+#   python benchmarks/bench_pipeline.py --compare benchmarks/results/<이전 결과>.json
+#
+# - 생성한 원가수불부는 --data-dir 에 보관해 다음 실행에서 재사용 (100만 품목 CSV 생성은 수 분 소요)
+# - 결과는 --results-dir 에 JSON 으로 저장 (커밋, 실행 환경, 단계별 시간/메모리)
+# - 시간은 최소값(--repeat 회), 메모리는 별도 1회 실행의 tracemalloc 최대값 (추적 비용이 시간에 섞이지 않도록)
+# - app 단계는 app.py 전체 실행(화면 구성/상세 표 포함)이며 --app-max-items 이하 크기에서만 측정
+#   (파일 파싱은 별도 프로세스에서 실행되므로 app 단계 메모리에는 포함되지 않음)
+
+DEFAULT_SIZES = [1000, 10000, 100000, 1000000]
+STAGES = ['parse', 'parse_chunked', 'item_master', 'aggregate_periods', 'comparison', 'group_mapping',
+          'summary', 'export', 'app']
+MAPPING_RATIO = 0.1
+
+
+def git_revision():
+    try:
+        rev = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_DIR, capture_output=True, text=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=REPO_DIR,
+                               capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return 'unknown'
+    return f"{rev}-dirty" if dirty else rev or 'unknown'
+
+
+def measure(func, repeat, with_memory):
+    times, result = [], None
+    for _ in range(repeat):
+        result = None
+        gc.collect()
+        t = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - t)
+
+    peak = None
+    if with_memory:
+        gc.collect()
+        tracemalloc.start()
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return result, min(times), peak
+
+
+def _parse_files(paths, csv_chunksize=None):
+    dfs = []
+    for path in paths:
+        with open(path, 'rb') as f:
+            dfs.append(process_inventory_data(f, path, csv_chunksize=csv_chunksize))
+    return dfs
+
+
+def _app_run(paths, fmt):
+    from bench_app_memory import run_app
+
+    payloads = []
+    for path in paths:
+        with open(path, 'rb') as f:
+            payloads.append(f.read())
+    # 파싱 캐시(cache_resource)와 분석 그래프(session_state)를 비워 매 실행이 처음부터 계산하도록 함
+    def run():
+        import streamlit as st
+
+        # bare 모드 실행 경고(ScriptRunContext 등) 출력 생략
+        logging.disable(logging.WARNING)
+        try:
+            st.cache_resource.clear()
+            st.session_state.clear()
+            return run_app(REPO_DIR, payloads, fmt)
+        finally:
+            logging.disable(logging.NOTSET)
+    return run
+
+
+# 한 크기에 대해 선택한 단계를 순서대로 실행 (각 단계는 앞 단계 결과를 입력으로 사용)
+def run_size(n_items, args):
+    data_dir = os.path.join(args.data_dir, f"n{n_items}_s{args.sparsity}_p{args.presence}_{args.fmt}")
+    t = time.perf_counter()
+    paths = write_period_ledgers(data_dir, n_items, fmt=args.fmt, presence=args.presence, sparsity=args.sparsity)
+    print(f"\n품목 {n_items:,}개 ({args.fmt}, 데이터 준비 {time.perf_counter() - t:.1f}s, "
+          f"{sum(os.path.getsize(p) for p in paths) / 1e6:.1f} MB)")
+
+    with_memory = not args.no_memory
+    rows, state = [], {}
+
+    def record(stage, func, rows_of=len):
+        result, seconds, peak = measure(func, args.repeat, with_memory)
+        n_out = rows_of(result) if result is not None else None
+        rows.append({'items': n_items, 'stage': stage, 'seconds': round(seconds, 4),
+                     'peak_mb': round(peak / 1e6, 2) if peak is not None else None, 'rows_out': n_out})
+        mem = f"{peak / 1e6:10.1f} MB" if peak is not None else ''
+        print(f"  {stage:<18}{seconds:9.3f}s{mem}")
+        return result
+
+    stages = set(args.stages)
+    state['dfs'] = record('parse', lambda: _parse_files(paths), lambda r: sum(len(d) for d in r))
+    if 'parse_chunked' in stages and args.fmt == 'csv':
+        record('parse_chunked', lambda: _parse_files(paths, args.csv_chunksize), lambda r: sum(len(d) for d in r))
+
+    dfs = state['dfs']
+    if stages & {'item_master', 'aggregate_periods', 'comparison', 'group_mapping', 'summary', 'export'}:
+        state['index'] = record('item_master', lambda: build_item_index(dfs), lambda r: len(r.items))
+        state['values'] = record('aggregate_periods', lambda: aggregate_periods(dfs, state['index']))
+        comp = record('comparison', lambda: build_comparison(state['index'].items, state['values']))
+
+        rng = np.random.default_rng(0)
+        codes = comp['품목코드'].to_numpy()
+        picked = rng.choice(len(codes), int(len(codes) * MAPPING_RATIO), replace=False)
+        mapping = dict(zip(codes[picked], [f"매핑그룹{i % 50}" for i in range(len(picked))]))
+        groups = record('group_mapping', lambda: apply_group_mapping(comp, mapping))
+        comp = comp.assign(분석그룹=groups.to_numpy())
+
+        summary = record('summary', lambda: summarize_by_account(comp))
+        if 'export' in stages:
+            record('export', lambda: build_analysis_workbook(summary, comp), lambda r: len(r))
+    state.clear()
+
+    if 'app' in stages:
+        if n_items <= args.app_max_items:
+            record('app', _app_run(paths, args.fmt), lambda r: len(r.get('comp_all', ())))
+        else:
+            print(f"  {'app':<18}생략 (--app-max-items {args.app_max_items:,} 초과)")
+
+    return [r for r in rows if r['stage'] in stages]
+
+
+def print_comparison(rows, baseline_path):
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = json.load(f)
+    before = {(r['items'], r['stage']): r for r in baseline['results']}
+
+    print(f"\n{baseline_path} ({baseline['meta']['git']}) 대비")
+    print(f"{'품목 수':>10}  {'단계':<18}{'이전(s)':>10}{'현재(s)':>10}{'배율':>8}{'이전(MB)':>11}{'현재(MB)':>11}")
+    for r in rows:
+        old = before.get((r['items'], r['stage']))
+        if old is None: continue
+        ratio = r['seconds'] / old['seconds'] if old['seconds'] else float('nan')
+        old_mb = f"{old['peak_mb']:11.1f}" if old.get('peak_mb') is not None else f"{'-':>11}"
+        new_mb = f"{r['peak_mb']:11.1f}" if r.get('peak_mb') is not None else f"{'-':>11}"
+        print(f"{r['items']:>10,}  {r['stage']:<18}{old['seconds']:10.3f}{r['seconds']:10.3f}{ratio:7.2f}x{old_mb}{new_mb}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="원가수불부 분석 파이프라인 단계별 벤치마크")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help="기간별 품목 풀 크기")
+    parser.add_argument('--stages', nargs='+', choices=STAGES, default=STAGES)
+    parser.add_argument('--fmt', choices=['csv', 'xlsx'], default='csv')
+    parser.add_argument('--sparsity', type=float, default=0.3, help="빈 칸으로 남길 수량/금액 칸 비율")
+    parser.add_argument('--presence', type=float, default=0.9, help="기간별로 포함할 품목 비율")
+    parser.add_argument('--csv-chunksize', type=int, default=DEFAULT_CSV_CHUNKSIZE)
+    parser.add_argument('--repeat', type=int, default=1)
+    parser.add_argument('--no-memory', action='store_true', help="tracemalloc 메모리 측정 생략")
+    parser.add_argument('--app-max-items', type=int, default=10000)
+    parser.add_argument('--data-dir', default=os.path.join(BENCH_DIR, 'data'))
+    parser.add_argument('--results-dir', default=os.path.join(BENCH_DIR, 'results'))
+    parser.add_argument('--compare', help="비교할 이전 결과 JSON")
+    args = parser.parse_args()
+
+    os.environ.setdefault('LEDGER_STORE_DIR', tempfile.mkdtemp(prefix='ledger_store_'))
+    meta = {
+        'git': git_revision(),
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'args': {k: v for k, v in vars(args).items() if k not in ('data_dir', 'results_dir', 'compare')},
+    }
+    print(f"커밋 {meta['git']}, Python {meta['python']}, pandas {meta['pandas']}, CPU {meta['cpu_count']}개")
+
+    rows = []
+    for n_items in args.sizes:
+        rows += run_size(n_items, args)
+
+    os.makedirs(args.results_dir, exist_ok=True)
+    out_path = os.path.join(args.results_dir, f"{datetime.now():%Y%m%d-%H%M%S}_{meta['git']}.json")
+    with open(out_path, 'w', encoding='utf-8') as f:
+        json.dump({'meta': meta, 'results': rows}, f, ensure_ascii=False, indent=1)
+    print(f"\n결과 저장: {out_path}")
+
+    if args.compare:
+        print_comparison(rows, args.compare)
+
+
+if __name__ == '__main__':
+    main()
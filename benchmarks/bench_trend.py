@@ -0,0 +1,103 @@
+import argparse
+import io
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from inventory_engine import (AMOUNT_COLUMNS, MASTER_COLUMNS, TREND_BASE_MONTHS, TREND_METRICS, build_analysis_workbook,  # noqa: E402
+                              build_item_index, build_trend_matrix, month_label, run_analysis, summarize_trend,
+                              trailing_months, trend_items, trend_series)
+from synthetic_erp10 import make_item_pool  # noqa: E402
+
+# 월별 추이 분석 단계별 소요 시간 (기본: 표시 24개월 + 전년 동월 비교 기준 12개월 x 10만 품목) 및 월 합계/증감 결과 확인
+# - 파싱은 bench_pipeline 에서 측정하므로 전처리가 끝난 형태의 월별 자료를 바로 생성
+# - 월별 자료마다 품목코드가 빈(NaN) 원재료 행(ERP 소계 등)을 넣어 집계에서 제외되는지 확인
+# - 화면 조작(지표/계정/분석그룹 전환, 상세 월 선택)에 해당하는 trend_series/trend_items 가 응답 시간 기준
+# 사용법: python benchmarks/bench_trend.py --items 100000 --months 24
+
+
+def make_month_frames(n_items, n_months, seed=0, presence=0.9, blank_codes=3):
+    pool = make_item_pool(n_items, seed)
+    pool['품목계정그룹'] = pool['품목계정그룹'].replace('제품(OEM)', '제품')
+    rng = np.random.default_rng(seed + 1)
+    frames = []
+    for _ in range(n_months):
+        frame = pool.loc[rng.random(n_items) < presence, MASTER_COLUMNS].reset_index(drop=True)
+        for col in AMOUNT_COLUMNS:
+            frame[col] = rng.integers(0, 10**8, len(frame)).astype('float64')
+        blank = frame.iloc[:blank_codes].assign(품목계정그룹='원재료', 품목코드=pd.Series([np.nan] * blank_codes, dtype='str'))
+        frames.append(pd.concat([frame, blank], ignore_index=True))
+    return frames
+
+
+def best_of(func, repeat):
+    times, result = [], None
+    for _ in range(repeat):
+        t = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - t)
+    return result, min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--items', type=int, default=100000)
+    parser.add_argument('--months', type=int, default=24, help="표시 기간 (앞쪽 비교 기준 월은 별도로 추가)")
+    parser.add_argument('--missing', type=int, nargs='*', default=[5], help="자료가 없는 월 위치 (0 = 비교 기준 첫 달)")
+    parser.add_argument('--blank-codes', type=int, default=3, help="월별로 추가할 품목코드가 빈 행 수")
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    months = trailing_months(2026, 3, args.months + TREND_BASE_MONTHS)
+    dfs = make_month_frames(args.items, len(months), blank_codes=args.blank_codes)
+    for m in args.missing:
+        dfs[m] = None
+    print(f"{month_label(*months[TREND_BASE_MONTHS])} ~ {month_label(*months[-1])} ({args.months}개월, "
+          f"비교 기준 {month_label(*months[0])} 부터, 자료 없는 월 {len(args.missing)}개), 월별 품목 풀 {args.items:,}개")
+
+    item_index, t_index = best_of(lambda: build_item_index(dfs), args.repeat)
+    trend, t_matrix = best_of(lambda: build_trend_matrix(dfs, item_index, months), args.repeat)
+    groups = item_index.items['분석그룹']
+    totals, t_totals = best_of(lambda: summarize_trend(trend, groups, args.months), args.repeat)
+    series, t_series = best_of(lambda: trend_series(totals, '재료비', '원재료'), args.repeat)
+    _, t_items = best_of(lambda: trend_items(trend, '매출원가', len(months) - 1, groups), args.repeat)
+
+    rows = [
+        ('품목 ID (build_item_index)', t_index, f"품목 {len(trend.items):,}개"),
+        ('품목 x 월 행렬 (build_trend_matrix)', t_matrix, f"{trend.amounts.nbytes / 1e6:,.1f} MB"),
+        ('계정/분석그룹 월 합계·증감 (summarize_trend)', t_totals, f"{len(totals):,}행"),
+        ('화면 전환 (trend_series)', t_series, ''),
+        ('상세 월 선택 (trend_items)', t_items, ''),
+    ]
+    for label, seconds, note in rows:
+        print(f"  {label:<40}{seconds:8.3f}s  {note}")
+
+    # 표시 기간의 월별 원재료 재료비 합계와 증감을 월별 자료의 직접 합계(품목코드가 빈 행 제외)와 비교
+    src = TREND_METRICS['재료비']
+    expected = pd.Series([np.nan if d is None else d.loc[(d['품목계정그룹'] == '원재료') & d['품목코드'].notna(), src].sum()
+                          for d in dfs],
+                         index=[month_label(*m) for m in months])
+    shown = slice(TREND_BASE_MONTHS, None)
+    pd.testing.assert_series_equal(series['금액'], expected[shown], check_names=False)
+    pd.testing.assert_series_equal(series['전월대비'], (expected - expected.shift(1))[shown], check_names=False)
+    pd.testing.assert_series_equal(series['전년동월대비'], (expected - expected.shift(12))[shown], check_names=False)
+    print("결과 일치: OK")
+
+    # 마지막 달 지표별 전체 합계 = 같은 자료를 당월로 둔 기준월 분석의 총괄 보고서 합계 (매출원가 반제품 제외, 재료비 원재료/부재료)
+    comp, summary = run_analysis([dfs[-1]] * 5)
+    sheets = ['기말재고_총괄', '매출원가_총괄', '재료비_총괄']
+    report = pd.read_excel(io.BytesIO(build_analysis_workbook(summary, comp)), sheet_name=sheets)
+    for metric, (sheet, col) in {'기말재고': ('기말재고_총괄', '당월말_재고'), '매출원가': ('매출원가_총괄', '당월_매출원가'),
+                                 '재료비': ('재료비_총괄', '당월_재료비')}.items():
+        total = report[sheet].loc[report[sheet]['품목계정그룹'] == '▶ 합계 (TOTAL)', col].iloc[0]
+        assert np.isclose(trend_series(totals, metric)['금액'].iloc[-1], total), metric
+    print("기준월 총괄 보고서와 지표별 합계 일치: OK")
+
+
+if __name__ == '__main__':
+    main()
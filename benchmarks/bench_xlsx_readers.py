@@ -0,0 +1,50 @@
+import argparse
+import io
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from inventory_engine import XLSX_READERS, process_inventory_data  # noqa: E402
+from synthetic_erp10 import ledger_bytes  # noqa: E402
+
+# xlsx 읽기 엔진별 process_inventory_data 소요 시간 비교
+# 사용법: python benchmarks/bench_xlsx_readers.py --rows 50000 --repeat 3
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    t = time.perf_counter()
+    raw = ledger_bytes(args.rows)
+    print(f"합성 원가수불부 {args.rows:,}행 생성: {len(raw) / 1e6:.1f} MB ({time.perf_counter() - t:.1f}s)")
+
+    baseline = None
+    # openpyxl(기본 엔진)을 기준으로 다른 엔진의 결과가 동일한지 함께 확인
+    for reader in ['openpyxl'] + [r for r in XLSX_READERS if r not in ('auto', 'openpyxl')]:
+        times = []
+        for _ in range(args.repeat):
+            t = time.perf_counter()
+            df = process_inventory_data(io.BytesIO(raw), 'bench.xlsx', xlsx_reader=reader)
+            times.append(time.perf_counter() - t)
+
+        if baseline is None:
+            baseline = df
+            same = '-'
+        else:
+            try:
+                pd.testing.assert_frame_equal(baseline.reset_index(drop=True), df.reset_index(drop=True), check_dtype=False)
+                same = 'OK'
+            except AssertionError:
+                same = 'DIFF'
+        print(f"{reader:<18} best {min(times):7.2f}s  mean {sum(times) / len(times):7.2f}s  결과 일치: {same}")
+
+
+if __name__ == '__main__':
+    main()
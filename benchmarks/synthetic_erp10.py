@@ -0,0 +1,118 @@
+import io
+import os
+
+import numpy as np
+import pandas as pd
+
+# 벤치마크용 합성 원가수불부(ERP10 실제원가수불) 데이터 생성기
+# - 1행: 대분류 헤더(병합 셀이므로 첫 칸 외에는 빈 값), 2행: 수량/단가/금액 소분류
+# - 금액 일부는 ERP 내보내기처럼 천 단위 콤마 문자열로 기록
+# - sparsity: 수불이 없는 칸을 ERP 처럼 빈 칸으로 남기는 비율 (0 ~ 1)
+# - subtotal: 마지막에 ERP 소계 행(품목코드/품목명 빈 칸, 금액만 있음)을 추가, 전처리에서 제외되어야 함
+# - 5개 기간 자료는 같은 품목 풀에서 presence 비율만큼 뽑아 기간별로 품목이 일부 다르게 구성
+
+MASTER_COLS = ['품목계정그룹', '품목코드', '품목명', '규격', '단위']
+FLOW_GROUPS = ['기초재고', '구매입고', '생산입고', '기타입고', '생산출고', '판매출고', '기타출고', '기말재고']
+FLOW_SUBS = ['수량', '단가', '금액']
+# 제품(OEM) 은 전처리에서 제품으로 합쳐지므로 분석 기준 계정은 5개
+ACCOUNT_GROUPS = ['제품', '상품', '반제품', '원재료', '부재료', '제품(OEM)']
+PERIOD_COUNT = 5
+CSV_BLOCK_ROWS = 100000
+
+
+def make_item_pool(n_items, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        '품목계정그룹': rng.choice(ACCOUNT_GROUPS, n_items),
+        '품목코드': np.char.add('IT', np.char.zfill(rng.permutation(n_items * 2)[:n_items].astype(str), 7)),
+        '품목명': np.char.add(np.char.add('품목', (np.arange(n_items) % 500).astype(str)), np.char.add('-', np.arange(n_items).astype(str))),
+        '규격': np.full(n_items, 'STD'),
+        '단위': rng.choice(['EA', 'KG', 'M', 'BOX'], n_items),
+    })
+
+
+def make_ledger_header():
+    header_main = list(MASTER_COLS)
+    header_sub = [None] * len(MASTER_COLS)
+    for g in FLOW_GROUPS:
+        header_main += [g] + [None] * (len(FLOW_SUBS) - 1)
+        header_sub += FLOW_SUBS
+    return pd.DataFrame([header_main, header_sub])
+
+
+def _amount_column(rng, n, comma_ratio, sparsity):
+    values = rng.integers(0, 10**8, n)
+    if not comma_ratio and not sparsity:
+        return values
+    values = values.astype(object)
+    as_text = rng.random(n) < comma_ratio
+    values[as_text] = [f"{v:,}" for v in values[as_text]]
+    values[rng.random(n) < sparsity] = None
+    return values
+
+
+def make_ledger_body(pool, seed=0, comma_ratio=0.3, sparsity=0.0):
+    rng = np.random.default_rng(seed)
+    frame = pd.DataFrame({i: pool[c].to_numpy() for i, c in enumerate(MASTER_COLS)})
+    for i in range(len(FLOW_GROUPS) * len(FLOW_SUBS)):
+        frame[len(MASTER_COLS) + i] = _amount_column(rng, len(pool), comma_ratio, sparsity)
+    return frame
+
+
+def make_subtotal_row(seed=0):
+    rng = np.random.default_rng(seed)
+    amounts = rng.integers(0, 10**9, len(FLOW_GROUPS) * len(FLOW_SUBS))
+    return pd.DataFrame([['소계'] + [None] * (len(MASTER_COLS) - 1) + [f"{v:,}" for v in amounts]])
+
+
+def make_ledger_frame(n_items, seed=0, comma_ratio=0.3, sparsity=0.0, pool=None, subtotal=True):
+    pool = make_item_pool(n_items, seed) if pool is None else pool
+    parts = [make_ledger_header(), make_ledger_body(pool, seed, comma_ratio, sparsity)]
+    if subtotal: parts.append(make_subtotal_row(seed))
+    return pd.concat(parts, ignore_index=True)
+
+
+def ledger_bytes(n_items, seed=0, fmt='xlsx', **kwargs):
+    frame = make_ledger_frame(n_items, seed=seed, **kwargs)
+    buf = io.BytesIO()
+    if fmt == 'csv':
+        frame.to_csv(buf, index=False, header=False)
+    else:
+        frame.to_excel(buf, index=False, header=False)
+    return buf.getvalue()
+
+
+# 당월/전월/당기누적/전기동기/전기전체 순서의 품목 풀 (공통 풀에서 presence 비율만큼 추출, 순서 유지)
+def make_period_pools(n_items, seed=0, presence=0.9):
+    pool = make_item_pool(n_items, seed)
+    rng = np.random.default_rng(seed + 1)
+    return [pool[rng.random(n_items) < presence].reset_index(drop=True) for _ in range(PERIOD_COUNT)]
+
+
+# 파일로 저장: CSV 는 블록 단위로 이어 써서 100만 품목도 메모리에 전체 프레임을 만들지 않음
+def write_ledger(path, pool, seed=0, fmt='csv', comma_ratio=0.3, sparsity=0.0, block_rows=CSV_BLOCK_ROWS, subtotal=True):
+    if fmt != 'csv':
+        make_ledger_frame(len(pool), seed, comma_ratio, sparsity, pool=pool, subtotal=subtotal).to_excel(path, index=False, header=False)
+        return path
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+        make_ledger_header().to_csv(f, index=False, header=False)
+        for b, start in enumerate(range(0, len(pool), block_rows)):
+            block = pool.iloc[start:start + block_rows]
+            make_ledger_body(block, seed * 1000 + b, comma_ratio, sparsity).to_csv(f, index=False, header=False)
+        if subtotal:
+            make_subtotal_row(seed).to_csv(f, index=False, header=False)
+    os.replace(tmp_path, path)
+    return path
+
+
+def write_period_ledgers(out_dir, n_items, seed=0, fmt='csv', presence=0.9, **kwargs):
+    os.makedirs(out_dir, exist_ok=True)
+    paths = []
+    for i, pool in enumerate(make_period_pools(n_items, seed, presence)):
+        path = os.path.join(out_dir, f"ledger_{i + 1}.{fmt}")
+        if not os.path.exists(path):
+            write_ledger(path, pool, seed + i, fmt, **kwargs)
+        paths.append(path)
+    return paths
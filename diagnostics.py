@@ -0,0 +1,125 @@
+import json
+import logging
+import os
+import threading
+import time
+import tracemalloc
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+
+# 단계별 소요 시간/메모리 계측 (앱 진단 패널, 구조화 로그, JSON 덤프 공용)
+# - 시간: perf_counter, 메모리: 프로세스 RSS(Linux /proc) 와 선택적 tracemalloc 최대값
+# - 단계가 끝날 때마다 'inventory_ledger.diagnostics' 로거에 JSON 한 줄을 남김
+#   DIAGNOSTICS_LOG_PATH 환경 변수를 지정하면 해당 파일에 JSON Lines 로 기록
+
+logger = logging.getLogger('inventory_ledger.diagnostics')
+
+_log_path = os.environ.get('DIAGNOSTICS_LOG_PATH')
+if _log_path and not logger.handlers:
+    _handler = logging.FileHandler(_log_path, encoding='utf-8')
+    _handler.setFormatter(logging.Formatter('%(message)s'))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+
+
+def current_rss():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def _mb(value):
+    return None if value is None else round(value / 1e6, 2)
+
+
+# tracemalloc 은 프로세스 전체에 적용되므로 추적을 켠 세션 ID 를 모아 관리 (스크립트 실행마다 호출)
+# - 켠 세션이 하나라도 남아 있으면 유지하고, 모두 끄거나 닫히면 중지 (다른 세션의 측정 중에 추적이 꺼지지 않도록)
+# - is_active(세션 ID) 를 주면 끄지 않고 닫힌 탭의 세션을 목록에서 제거
+# - 벤치마크 등 외부에서 시작한 추적은 중지하지 않음
+_tracing_sessions = set()
+_tracing_started = False  # 이 모듈이 시작한 추적인지
+_tracing_lock = threading.Lock()
+
+
+def set_memory_tracing(session_id, enabled, is_active=None):
+    global _tracing_started
+    with _tracing_lock:
+        if is_active is not None:
+            _tracing_sessions.difference_update([s for s in _tracing_sessions if not is_active(s)])
+        if enabled:
+            _tracing_sessions.add(session_id)
+        else:
+            _tracing_sessions.discard(session_id)
+
+        if _tracing_sessions:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                _tracing_started = True
+        elif _tracing_started:
+            if tracemalloc.is_tracing(): tracemalloc.stop()
+            _tracing_started = False
+
+
+class StageProfiler:
+    def __init__(self):
+        self.run_id = uuid.uuid4().hex[:8]
+        self.started_at = datetime.now().isoformat(timespec='seconds')
+        self.stages = []
+        self.memory = {}  # 이름 -> 표 메모리 등 시간과 무관한 측정값
+        self._stack = []  # 진행 중인 단계의 tracemalloc 최대값 (중첩 단계가 reset_peak 해도 바깥 단계 최대값 유지)
+        self._lock = threading.Lock()
+
+    # with profiler.stage('parse', files=3) as record: ... (record 에 항목을 추가하면 함께 기록)
+    @contextmanager
+    def stage(self, name, **meta):
+        record = {'stage': name, 'depth': len(self._stack), **meta}
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            if self._stack:
+                self._stack[-1] = max(self._stack[-1], tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+        self._stack.append(0)
+        rss = current_rss()
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record['seconds'] = round(time.perf_counter() - start, 4)
+            peak = self._stack.pop()
+            if tracing and tracemalloc.is_tracing():
+                peak = max(peak, tracemalloc.get_traced_memory()[1])
+                record['peak_mb'] = _mb(peak - base)
+                if self._stack:
+                    self._stack[-1] = max(self._stack[-1], peak)
+            end_rss = current_rss()
+            record['rss_mb'] = _mb(end_rss)
+            record['rss_delta_mb'] = _mb(end_rss - rss) if rss is not None and end_rss is not None else None
+            self._append(record)
+
+    # 다른 프로세스에서 측정한 값 등 이미 잰 시간을 그대로 기록
+    def add(self, name, seconds, **meta):
+        self._append({'stage': name, 'depth': len(self._stack), 'seconds': round(seconds, 4), **meta})
+
+    def record_memory(self, name, **values):
+        self.memory[name] = values
+        logger.info(json.dumps({'run_id': self.run_id, 'memory': name, **values}, ensure_ascii=False, default=str))
+
+    def _append(self, record):
+        with self._lock:
+            self.stages.append(record)
+        logger.info(json.dumps({'run_id': self.run_id, **record}, ensure_ascii=False, default=str))
+
+    def total_seconds(self):
+        return sum(r['seconds'] for r in self.stages if r['depth'] == 0)
+
+    def to_dict(self):
+        return {'run_id': self.run_id, 'started_at': self.started_at,
+                'total_seconds': round(self.total_seconds(), 4), 'stages': list(self.stages), 'memory': dict(self.memory)}
+
+
+def dump_profiles(profilers):
+    return json.dumps([p.to_dict() for p in profilers], ensure_ascii=False, indent=1, default=str)
@@ -0,0 +1,764 @@
+import io
+import hashlib
+import os
+import re
+import threading
+import time
+import multiprocessing
+from contextlib import nullcontext
+from dataclasses import dataclass
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+import pandas as pd
+
+# Streamlit 에 의존하지 않는 분석 엔진 모듈
+# - 프로세스 풀 워커가 import 할 수 있도록 app.py(Streamlit 스크립트)와 분리
+
+
+# 0. xlsx 읽기 엔진 (설정으로 선택, 실패 시 openpyxl 로 자동 대체)
+# - calamine: Rust 기반 파서(python-calamine 필요), 대용량 ERP10 파일에서 가장 빠름
+# - openpyxl_readonly: openpyxl 스트리밍 모드, 셀 서식 객체를 만들지 않음
+# - openpyxl: pandas 기본 엔진
+XLSX_READERS = ['auto', 'calamine', 'openpyxl_readonly', 'openpyxl']
+DEFAULT_XLSX_READER = 'auto'
+
+
+def _calamine_available():
+    try:
+        import python_calamine  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _read_xlsx_openpyxl_readonly(file):
+    from openpyxl import load_workbook
+
+    wb = load_workbook(file, read_only=True, data_only=True)
+    try:
+        rows = []
+        for row in wb.worksheets[0].iter_rows(values_only=True):
+            # pd.read_excel 과 동일하게 행 끝의 빈 셀과 파일 끝의 빈 행은 제외
+            row = list(row)
+            while row and row[-1] is None:
+                row.pop()
+            rows.append(row)
+        while rows and not rows[-1]:
+            rows.pop()
+    finally:
+        wb.close()
+    return pd.DataFrame(rows).fillna(np.nan)
+
+
+def read_xlsx_raw(file, reader=DEFAULT_XLSX_READER):
+    if reader not in XLSX_READERS:
+        raise ValueError(f"지원하지 않는 xlsx 읽기 엔진: {reader}")
+    if reader == 'auto':
+        reader = 'calamine' if _calamine_available() else 'openpyxl'
+
+    if reader != 'openpyxl':
+        start = file.tell() if hasattr(file, 'tell') else None
+        try:
+            if reader == 'calamine':
+                return pd.read_excel(file, header=None, engine='calamine')
+            return _read_xlsx_openpyxl_readonly(file)
+        except Exception:
+            # 엔진 미설치/미지원 파일 등은 기본 엔진으로 다시 읽음
+            if start is None: raise
+            file.seek(start)
+    return pd.read_excel(file, header=None, engine='openpyxl')
+
+
+# 1. 원가수불부(ERP10) 데이터 전처리 (오류는 호출자에게 그대로 전달)
+# 분석에 실제로 사용하는 열 (project=True 이면 이 열만 변환/보관)
+MASTER_COLUMNS = ['품목계정그룹', '품목코드', '품목명', '단위']
+AMOUNT_COLUMNS = ['생산출고_금액', '판매출고_금액', '기말재고_금액']
+
+
+# 병합된 2단 헤더(대분류 + 수량/금액 소분류)를 '대분류_소분류' 열 이름으로 변환
+def build_ledger_columns(header_main, header_sub):
+    header_main = header_main.ffill()
+    header_sub = header_sub.fillna('')
+    new_cols = []
+    for m, s in zip(header_main, header_sub):
+        col_name = f"{m}_{s}".strip("_") if s != '' else str(m)
+        new_cols.append(col_name)
+    return new_cols
+
+
+def _is_numeric_column(col):
+    return '수량' in col or '금액' in col
+
+
+def _analysis_positions(columns):
+    keep = [i for i, c in enumerate(columns) if c in MASTER_COLUMNS or c in AMOUNT_COLUMNS]
+    if '기말재고_금액' not in columns:
+        # 아래 기말재고 열 이름 보정과 같은 규칙으로 대체 열을 남김
+        possible_stock = [i for i, c in enumerate(columns) if '기말재고' in c and '금액' in c]
+        if possible_stock: keep = sorted(keep + possible_stock[-1:])
+    return keep
+
+
+# 천 단위 콤마 문자열과 숫자 셀이 섞인 열을 float64 로 변환 (str 왕복 변환은 콤마가 있는 값에만 적용)
+def to_amount(series):
+    if pd.api.types.is_numeric_dtype(series):
+        return series.astype('float64').fillna(0)
+    if isinstance(series.dtype, pd.StringDtype):
+        return pd.to_numeric(series.str.replace(',', '', regex=False), errors='coerce').astype('float64').fillna(0)
+
+    values = pd.to_numeric(series, errors='coerce')
+    text = values.isna() & series.notna()
+    if text.any():
+        values.loc[text] = pd.to_numeric(series[text].astype(str).str.replace(',', '', regex=False), errors='coerce')
+    return values.astype('float64').fillna(0)
+
+
+# 전처리 세부 단계 시간 누적 (timings 가 None 이면 기록하지 않음): 다음 단계의 시작 시각을 반환
+def _lap(timings, step, start):
+    now = time.perf_counter()
+    if timings is not None:
+        timings[step] = timings.get(step, 0.0) + now - start
+    return now
+
+
+# CSV 는 헤더 2행을 먼저 읽어 필요한 열만 파싱 (금액 열은 C 파서에서 콤마 제거)
+def _csv_body_reader(file, project, chunksize=None):
+    start = file.tell()
+    header = pd.read_csv(file, header=None, nrows=2, dtype=str)
+    file.seek(start)
+    columns = build_ledger_columns(header.iloc[0], header.iloc[1])
+    positions = _analysis_positions(columns) if project else list(range(len(columns)))
+
+    # 품목코드 등 문자 열은 앞자리 0 이 사라지지 않도록 문자열로 읽음
+    text_dtypes = {i: str for i in positions if not _is_numeric_column(columns[i])}
+    body = pd.read_csv(file, header=None, skiprows=2, usecols=positions, dtype=text_dtypes, thousands=',', chunksize=chunksize)
+    return body, [columns[i] for i in positions]
+
+
+def _read_csv_ledger(file, project):
+    df, names = _csv_body_reader(file, project)
+    df.columns = names
+    return df
+
+
+# 대용량 CSV 스트리밍: 본문을 chunk 단위로 정제/필터 후 품목코드별로 미리 합산
+# - 최대 메모리가 행 수가 아닌 품목 수에 비례 (반환 프레임은 품목코드당 1행)
+# - 금액은 합계, 품목명 등 문자 열은 처음 나온 행의 값 (빈 값 포함, 품목 마스터의 drop_duplicates 와 동일)
+DEFAULT_CSV_CHUNKSIZE = 200000
+
+
+def _preaggregate(df):
+    numeric_cols = [c for c in df.columns if _is_numeric_column(c)]
+    first = df.drop_duplicates('품목코드').drop(columns=numeric_cols)
+    sums = df.groupby('품목코드', sort=False)[numeric_cols].sum()
+    return first.join(sums, on='품목코드')[df.columns].reset_index(drop=True)
+
+
+def _read_csv_ledger_chunked(file, project, chunksize, timings=None):
+    t = time.perf_counter()
+    reader, names = _csv_body_reader(file, project, chunksize=chunksize)
+    t = _lap(timings, 'header', t)
+    acc = None
+    with reader:
+        for chunk in reader:
+            chunk.columns = names
+            t = _lap(timings, 'read', t)
+            part = _clean_ledger_frame(chunk, timings)
+            t = time.perf_counter()
+            part = _preaggregate(part)
+            acc = part if acc is None else _preaggregate(pd.concat([acc, part], ignore_index=True))
+            t = _lap(timings, 'preaggregate', t)
+    if acc is None:
+        acc = _clean_ledger_frame(pd.DataFrame(columns=names))
+    return acc
+
+
+# 문자 열 정리, 빈 품목코드(ERP 소계/합계 행) 제거, 수량/금액 숫자 변환, 기말재고 열 이름 보정
+# 빈 칸은 '' 로 통일 (pandas 3 의 str dtype 은 astype(str) 후에도 빈 칸을 'nan' 이 아닌 NaN 으로 유지)
+def _clean_ledger_frame(df, timings=None):
+    t = time.perf_counter()
+    for col in MASTER_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].fillna('').astype(str).str.strip().replace('nan', '')
+
+    df['품목계정그룹'] = df['품목계정그룹'].replace('제품(OEM)', '제품')
+    df = df[df['품목코드'] != ''].copy()
+    t = _lap(timings, 'clean', t)
+
+    numeric_cols = [c for c in df.columns if _is_numeric_column(c)]
+    for col in numeric_cols:
+        df[col] = to_amount(df[col])
+    _lap(timings, 'numeric', t)
+
+    if '기말재고_금액' not in df.columns:
+        possible_stock_cols = [c for c in df.columns if '기말재고' in c and '금액' in c]
+        if possible_stock_cols:
+            df.rename(columns={possible_stock_cols[-1]: '기말재고_금액'}, inplace=True)
+
+    return df
+
+
+# 반환 프레임의 자료형은 여기서 한 번만 확정 (문자 열: str, 수량/금액 열: float64)
+# 이후 단계(캐시/저장소 공유)에서는 읽기 전용으로 다루며 재변환·복사하지 않음
+# csv_chunksize 를 주면 CSV 는 스트리밍으로 읽고 품목코드별 합산 결과를 반환
+# timings(dict) 를 주면 세부 단계(read/header/clean/numeric/preaggregate) 소요 시간을 초 단위로 누적
+def process_inventory_data(file, file_name=None, xlsx_reader=DEFAULT_XLSX_READER, project=True, csv_chunksize=None,
+                           timings=None):
+    file_name = file_name or file.name
+    t = time.perf_counter()
+    if file_name.endswith('.csv'):
+        if csv_chunksize:
+            return _read_csv_ledger_chunked(file, project, csv_chunksize, timings)
+        df = _read_csv_ledger(file, project)
+        _lap(timings, 'read', t)
+    else:
+        df_raw = read_xlsx_raw(file, xlsx_reader)
+        t = _lap(timings, 'read', t)
+        columns = build_ledger_columns(df_raw.iloc[0], df_raw.iloc[1])
+        positions = _analysis_positions(columns) if project else list(range(len(columns)))
+        df = df_raw.iloc[2:, positions].copy()
+        df.columns = [columns[i] for i in positions]
+        _lap(timings, 'header', t)
+
+    return _clean_ledger_frame(df, timings)
+
+
+# 2. 병렬 파싱: (파일명, 바이트) 목록을 받아 (DataFrame, 오류메시지) 목록을 입력 순서대로 반환
+# step_timings(list) 를 주면 파일별 세부 단계 소요 시간 dict 를 같은 순서로 채움 (워커 프로세스에서 측정)
+# 바이트 대신 파일 객체(업로드 버퍼)를 주면 복사 없이 그 객체에서 읽음: 워커로 보낼 수 없으므로 max_workers=1 로 호출
+def _parse_payload(payload, xlsx_reader=DEFAULT_XLSX_READER, csv_chunksize=None):
+    file_name, raw = payload
+    timings = {}
+    try:
+        if isinstance(raw, (bytes, bytearray)):
+            file = io.BytesIO(raw)
+        else:
+            file = raw
+            file.seek(0)
+        return process_inventory_data(file, file_name, xlsx_reader, csv_chunksize=csv_chunksize,
+                                      timings=timings), None, timings
+    except Exception as e:
+        return None, str(e), timings
+
+
+def parse_inventory_files(payloads, max_workers=None, executor='process', xlsx_reader=DEFAULT_XLSX_READER, csv_chunksize=None,
+                          step_timings=None):
+    payloads = list(payloads)
+    if not payloads: return []
+
+    parse = partial(_parse_payload, xlsx_reader=xlsx_reader, csv_chunksize=csv_chunksize)
+    workers = min(max_workers or os.cpu_count() or 1, len(payloads))
+    if workers <= 1:
+        return _split_timings([parse(p) for p in payloads], step_timings)
+
+    if executor == 'process':
+        # spawn: Streamlit 서버(멀티스레드)에서 fork 시 교착 위험을 피하고 Windows 와 동작을 통일
+        pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+    elif executor == 'thread':
+        pool = ThreadPoolExecutor(max_workers=workers)
+    else:
+        raise ValueError(f"지원하지 않는 executor: {executor}")
+
+    with pool:
+        futures = [pool.submit(parse, p) for p in payloads]
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except BrokenProcessPool as e:
+                # 워커 프로세스가 비정상 종료(메모리 부족 등)되면 결과를 받지 못한 파일마다 오류로 돌려줌
+                results.append((None, f"파싱 프로세스가 비정상 종료되었습니다: {e}", {}))
+        return _split_timings(results, step_timings)
+
+
+def _split_timings(results, step_timings):
+    if step_timings is not None:
+        step_timings.extend(timings for _, _, timings in results)
+    return [(df, err) for df, err, _ in results]
+
+
+# 3. 기간 비교 엔진: 5개 기간 자료를 한 번에 합쳐 품목 ID x (기간, 지표) 금액표를 만듦
+ITEM_ID = '품목ID'
+
+# 원가수불부 업로드 순서(당월, 전월, 당기누적, 전기동기, 전기전체)별 '원본 열 -> 비교 열' 이름
+PERIOD_COLUMNS = [
+    {'생산출고_금액': '당월_생산출고', '판매출고_금액': '당월_판매출고', '기말재고_금액': '당월말_재고'},
+    {'생산출고_금액': '전월_생산출고', '판매출고_금액': '전월_판매출고', '기말재고_금액': '전월말_재고'},
+    {'생산출고_금액': '당기누적_생산출고', '판매출고_금액': '당기누적_판매출고'},
+    {'생산출고_금액': '전기동기_생산출고', '판매출고_금액': '전기동기_판매출고', '기말재고_금액': '전기동월말_재고'},
+    {'기말재고_금액': '전기말_재고'},
+]
+PERIOD_VALUE_COLUMNS = [c for mapping in PERIOD_COLUMNS for c in mapping.values()]
+
+# 증감 열 = 기준 열 - 비교 열
+VARIANCE_COLUMNS = {
+    '재고증감_vs전기말': ('당월말_재고', '전기말_재고'),
+    '재고증감_vs전기동월': ('당월말_재고', '전기동월말_재고'),
+    '재고증감_vs전월': ('당월말_재고', '전월말_재고'),
+    '판매_YoY증감': ('당기누적_판매출고', '전기동기_판매출고'),
+    '판매_MoM증감': ('당월_판매출고', '전월_판매출고'),
+    '생산_YoY증감': ('당기누적_생산출고', '전기동기_생산출고'),
+    '생산_MoM증감': ('당월_생산출고', '전월_생산출고'),
+}
+
+
+# 품목 ID 기준 합산: 기간 자료별 품목 ID 배열(ItemIndex)로 bincount, 문자열 품목코드는 다시 해시하지 않음
+# 반환 프레임의 행 순서는 품목 마스터와 같음 (build_comparison 에서 그대로 옆에 붙임)
+def aggregate_periods(period_dfs, item_index):
+    n_items = len(item_index.items)
+    values = np.zeros((n_items, len(PERIOD_VALUE_COLUMNS)))
+    positions = {c: i for i, c in enumerate(PERIOD_VALUE_COLUMNS)}
+
+    for i, (df, ids, mapping) in enumerate(zip(period_dfs, item_index.period_ids, PERIOD_COLUMNS)):
+        if ids is None: continue
+        valid = {src: dst for src, dst in mapping.items() if src in df.columns}
+        for src, dst in valid.items():
+            values[:, positions[dst]] += np.bincount(ids, weights=item_index.values(i, df, src), minlength=n_items)
+
+    return pd.DataFrame(values, columns=PERIOD_VALUE_COLUMNS, index=pd.RangeIndex(n_items, name=ITEM_ID))
+
+
+# 품목 마스터에 기간 금액을 붙이고 증감 열을 벡터 연산으로 계산
+def build_comparison(items, period_values):
+    comp = items.reset_index(drop=True)
+    values = period_values.reset_index(drop=True)
+    comp = pd.concat([comp, values], axis=1)
+
+    for col, (base, other) in VARIANCE_COLUMNS.items():
+        comp[col] = comp[base] - comp[other]
+    return comp
+
+
+# 4. 품목 마스터: 모든 기간 파일에서 품목을 취합 (데이터 누락 방지) + 기본 분석그룹(품목명 '-' 앞부분)
+# - 품목코드를 한 번만 factorize 해 품목 ID(= 품목 마스터 행 번호)와 기간 자료별 품목 ID 배열을 함께 만듦
+# - 품목코드/품목명: Arrow 문자열, 값 종류가 적은 품목계정그룹/단위/분석그룹: category
+ITEM_CATEGORY_COLUMNS = ['품목계정그룹', '단위', '분석그룹']
+
+
+@dataclass(frozen=True)
+class ItemIndex:
+    items: pd.DataFrame  # 품목 마스터
+    period_ids: list     # 기간 자료별 품목 ID 배열 (자료 행 순서, 품목이 없는 자료는 None)
+    period_rows: list    # 기간 자료별 품목 ID 가 있는 행 위치 (품목코드가 빈 행 제외, 모든 행이 유효하면 None)
+
+    # i 번째 기간 자료의 금액 열을 period_ids[i] 와 같은 행 순서로
+    def values(self, i, df, col):
+        values = df[col].to_numpy()
+        rows = self.period_rows[i]
+        return values if rows is None else values[rows]
+
+
+def build_item_index(period_dfs):
+    all_items_list, owners = [], []
+    for i, d in enumerate(period_dfs):
+        if d is not None and not d.empty:
+            cols = [c for c in ['품목코드', '품목명', '단위', '품목계정그룹'] if c in d.columns]
+            if '품목코드' in cols:
+                all_items_list.append(d[cols])
+                owners.append(i)
+
+    stacked = pd.concat(all_items_list, ignore_index=True)
+    # factorize 는 처음 나온 순서대로 ID 를 매기므로 ID 별 첫 행 = drop_duplicates('품목코드') 결과
+    ids, _ = pd.factorize(stacked['품목코드'])
+    # 품목코드가 빈(NaN) 행은 ID -1: 전처리에서 제거되지만 직접 만든 자료도 집계가 깨지지 않도록 제외
+    first_rows = np.flatnonzero(~pd.Series(ids).duplicated().to_numpy() & (ids >= 0))
+    all_items = stacked.iloc[first_rows].reset_index(drop=True)
+
+    for col in ['품목명', '단위', '품목계정그룹']:
+        if col not in all_items.columns:
+            all_items[col] = ""
+        else:
+            all_items[col] = all_items[col].fillna("")
+
+    all_items['분석그룹'] = all_items['품목명'].astype(str).str.replace(r'(?s)-.*', '', regex=True).str.strip()
+    all_items = all_items.astype({c: 'category' for c in ITEM_CATEGORY_COLUMNS})
+
+    period_ids, period_rows = [None] * len(period_dfs), [None] * len(period_dfs)
+    bounds = np.cumsum([0] + [len(d) for d in all_items_list])
+    for owner, start, end in zip(owners, bounds[:-1], bounds[1:]):
+        owner_ids = ids[start:end]
+        valid = owner_ids >= 0
+        if not valid.all():
+            period_rows[owner] = np.flatnonzero(valid)
+            owner_ids = owner_ids[valid]
+        period_ids[owner] = owner_ids
+    return ItemIndex(all_items, period_ids, period_rows)
+
+
+# 품목 마스터/비교표 메모리: 현재 표현과 category 열을 일반 문자열 열로 둔 경우(변경 전 표현) 비교 (진단용)
+def frame_memory(df):
+    plain = df.astype({c: str for c in df.columns if isinstance(df[c].dtype, pd.CategoricalDtype)})
+    return {'compact_mb': round(float(df.memory_usage(deep=True).sum()) / 1e6, 2),
+            'plain_mb': round(float(plain.memory_usage(deep=True).sum()) / 1e6, 2)}
+
+
+# 커스텀 매핑 파일(품목코드, 분석그룹 열) -> {품목코드: 분석그룹}
+def read_group_mapping(file, file_name=None):
+    file_name = file_name or file.name
+    mapping_df = pd.read_csv(file) if file_name.endswith('.csv') else pd.read_excel(file)
+    if '품목코드' not in mapping_df.columns or '분석그룹' not in mapping_df.columns:
+        return {}
+    mapping_df['품목코드'] = mapping_df['품목코드'].astype(str).str.strip()
+    return dict(zip(mapping_df['품목코드'], mapping_df['분석그룹']))
+
+
+# 매핑에 있는 품목만 분석그룹을 교체 (없으면 기본 분석그룹 유지)
+def apply_group_mapping(items, mapping_dict):
+    if not mapping_dict: return items['분석그룹']
+    return items['품목코드'].map(mapping_dict).fillna(items['분석그룹'])
+
+
+# 5. 의존성 기반 재계산 그래프
+# - 입력은 값과 지문(fingerprint)을 함께 등록하고, 노드는 의존 노드의 지문이 바뀐 경우에만 재계산
+# - 예: 분석그룹 매핑만 바뀌면 파싱/기간 비교는 그대로 두고 그룹 관련 노드만 다시 계산
+class ComputationGraph:
+    def __init__(self):
+        self._nodes = {}
+        self._inputs = {}
+        self._results = {}
+        self.profiler = None  # diagnostics.StageProfiler: 다시 계산되는 노드마다 시간/메모리 기록
+        # 다운로드 버튼 콜백은 스크립트 재실행과 별도 스레드에서 get() 을 호출함
+        self._lock = threading.RLock()
+
+    def add_node(self, name, func, deps=()):
+        self._nodes[name] = (func, tuple(deps))
+
+    def set_input(self, name, value, fingerprint):
+        with self._lock:
+            self._inputs[name] = (fingerprint, value)
+
+    def fingerprint(self, name):
+        if name in self._inputs:
+            return self._inputs[name][0]
+        _, deps = self._nodes[name]
+        return (name,) + tuple(self.fingerprint(d) for d in deps)
+
+    def get(self, name):
+        with self._lock:
+            if name in self._inputs:
+                return self._inputs[name][1]
+            fingerprint = self.fingerprint(name)
+            cached = self._results.get(name)
+            if cached is not None and cached[0] == fingerprint:
+                return cached[1]
+
+            func, deps = self._nodes[name]
+            args = [self.get(d) for d in deps]
+            with self.profiler.stage(name) if self.profiler is not None else nullcontext():
+                value = func(*args)
+            self._results[name] = (fingerprint, value)
+            return value
+
+
+# 순서를 포함한 열 내용 지문 (값 교환도 변경으로 인식)
+def series_fingerprint(series):
+    return hashlib.sha1(pd.util.hash_pandas_object(series, index=False).to_numpy().tobytes()).hexdigest()
+
+
+# 6. 품목계정그룹별 총괄 합계 (분석그룹 매핑과 무관)
+ACCOUNT_GROUPS = ['제품', '상품', '반제품', '원재료', '부재료']
+SUMMARY_COLUMNS = ['전기말_재고', '전기동월말_재고', '전월말_재고', '당월말_재고',
+                   '재고증감_vs전기말', '재고증감_vs전기동월', '재고증감_vs전월',
+                   '당기누적_판매출고', '전기동기_판매출고', '판매_YoY증감',
+                   '당월_판매출고', '전월_판매출고', '판매_MoM증감',
+                   '당기누적_생산출고', '전기동기_생산출고', '생산_YoY증감',
+                   '당월_생산출고', '전월_생산출고', '생산_MoM증감']
+
+
+def _order_accounts(summary_agg, groups):
+    summary_agg['품목계정그룹'] = pd.Categorical(summary_agg['품목계정그룹'], categories=groups, ordered=True)
+    return summary_agg.sort_values('품목계정그룹')
+
+
+def summarize_by_account(comp, groups=ACCOUNT_GROUPS):
+    return _order_accounts(comp.groupby('품목계정그룹')[SUMMARY_COLUMNS].sum().reset_index(), groups)
+
+
+# 6-1. 집계 큐브: 품목계정그룹 x 분석그룹 x 지표 합계 + (품목계정그룹, 화면)별 품목 행 위치
+# - 원가수불부/분석그룹이 바뀔 때만 한 번 만들고, 계정 버튼·탭 전환·총괄 보고서는 큐브 조회로 처리
+# - 화면(탭)별 표시 품목: 해당 화면의 기간 금액 중 하나라도 0 이 아닌 품목
+VIEW_ACTIVITY_COLUMNS = {
+    'inventory': ['전기말_재고', '전기동월말_재고', '전월말_재고', '당월말_재고'],
+    'cogs': ['당기누적_판매출고', '전기동기_판매출고', '당월_판매출고', '전월_판매출고'],
+    'material': ['당기누적_생산출고', '전기동기_생산출고', '당월_생산출고', '전월_생산출고'],
+}
+_EMPTY_POSITIONS = np.array([], dtype=np.intp)
+
+
+def _active_count_column(view):
+    return f"활성품목수_{view}"
+
+
+@dataclass(frozen=True)
+class SummaryCube:
+    totals: pd.DataFrame  # index (품목계정그룹, 분석그룹), 열: SUMMARY_COLUMNS + 화면별 표시 품목 수
+    positions: dict       # (품목계정그룹, 화면 또는 'all') -> 비교표 행 위치 (원래 순서)
+
+    def rows(self, comp, account, view='all'):
+        return comp.iloc[self.positions.get((account, view), _EMPTY_POSITIONS)]
+
+    # 행을 꺼내지 않고 품목 수만 (화면 표시 여부 판단용)
+    def count(self, account, view='all'):
+        return len(self.positions.get((account, view), _EMPTY_POSITIONS))
+
+    # 화면에 표시되는 품목이 있는 분석그룹만, 분석그룹 이름순 (groupby('분석그룹') 결과와 같은 순서)
+    def group_summary(self, account, view, columns):
+        if account not in self.totals.index.get_level_values('품목계정그룹'):
+            return pd.DataFrame(columns=['분석그룹'] + list(columns))
+        block = self.totals.loc[account]
+        block = block[block[_active_count_column(view)] > 0]
+        return block[list(columns)].rename_axis('분석그룹').reset_index()
+
+
+def build_summary_cube(comp):
+    active = {view: (comp[cols] != 0).any(axis=1).to_numpy() for view, cols in VIEW_ACTIVITY_COLUMNS.items()}
+    counts = pd.DataFrame({_active_count_column(view): mask.astype('int64') for view, mask in active.items()}, index=comp.index)
+    totals = pd.concat([comp[SUMMARY_COLUMNS], counts], axis=1)\
+        .groupby([comp['품목계정그룹'], comp['분석그룹']], sort=True).sum()
+
+    positions = {}
+    for account, pos in comp.groupby('품목계정그룹', sort=False).indices.items():
+        positions[(account, 'all')] = pos
+        for view, mask in active.items():
+            positions[(account, view)] = pos[mask[pos]]
+    return SummaryCube(totals, positions)
+
+
+def summarize_cube(cube, groups=ACCOUNT_GROUPS):
+    return _order_accounts(cube.totals[SUMMARY_COLUMNS].groupby(level='품목계정그룹').sum().reset_index(), groups)
+
+
+# 7. 엑셀 내보내기 (다운로드 요청 시에만 생성)
+# - xlsxwriter constant_memory 모드: 행 단위로 임시 파일에 기록해 20만 행 상세 시트도 워크북 전체를 메모리에 두지 않음
+# - constant_memory 는 행 순서대로만 쓸 수 있으므로 (열 단위로 쓰는) DataFrame.to_excel 대신 직접 행을 기록
+EXCEL_CHUNK_ROWS = 10000
+
+DETAIL_EXPORT_RENAME = {
+    '판매_YoY증감': '매출원가_전기대비증감', '판매_MoM증감': '매출원가_전월대비증감',
+    '생산_YoY증감': '재료비_전기대비증감', '생산_MoM증감': '재료비_전월대비증감',
+    '당기누적_판매출고': '당기누적_매출원가', '전기동기_판매출고': '전기누적_매출원가', '당월_판매출고': '당월_매출원가', '전월_판매출고': '전월_매출원가',
+    '당기누적_생산출고': '당기누적_재료비', '전기동기_생산출고': '전기누적_재료비', '당월_생산출고': '당월_재료비', '전월_생산출고': '전월_재료비'
+}
+DETAIL_EXPORT_COLUMNS = ['분석그룹', '품목계정그룹', '품목코드', '품목명', '단위',
+                         '전기말_재고', '전기동월말_재고', '전월말_재고', '당월말_재고', '재고증감_vs전기말', '재고증감_vs전기동월', '재고증감_vs전월',
+                         '당기누적_매출원가', '전기누적_매출원가', '매출원가_전기대비증감', '당월_매출원가', '전월_매출원가', '매출원가_전월대비증감',
+                         '당기누적_재료비', '전기누적_재료비', '재료비_전기대비증감', '당월_재료비', '전월_재료비', '재료비_전월대비증감']
+
+
+# 엑셀 다운로드를 위한 합계 행 생성 함수 (일반 텍스트 열 유지용)
+def append_total_for_excel(df, label_col='품목명'):
+    if df.empty: return df
+    num_cols = [c for c in df.columns if pd.api.types.is_numeric_dtype(df[c])]
+    totals = df[num_cols].sum()
+
+    total_data = {col: "" for col in df.columns}
+    for col in num_cols:
+        total_data[col] = totals[col]
+    if label_col in total_data:
+        total_data[label_col] = '▶ 합계 (TOTAL)'
+
+    total_df = pd.DataFrame([total_data])
+    return pd.concat([df, total_df], ignore_index=True)
+
+
+def _write_sheet(workbook, sheet_name, df, header_format):
+    worksheet = workbook.add_worksheet(sheet_name)
+    worksheet.write_row(0, 0, [str(c) for c in df.columns], header_format)
+    row = 1
+    for start in range(0, len(df), EXCEL_CHUNK_ROWS):
+        chunk = df.iloc[start:start + EXCEL_CHUNK_ROWS]
+        for values in chunk.astype(object).where(chunk.notna(), None).itertuples(index=False, name=None):
+            worksheet.write_row(row, 0, values)
+            row += 1
+
+
+def _build_workbook(sheets):
+    import xlsxwriter
+
+    output = io.BytesIO()
+    workbook = xlsxwriter.Workbook(output, {'constant_memory': True})
+    # pandas to_excel 기본 헤더 서식과 동일
+    header_format = workbook.add_format({'bold': True, 'border': 1, 'align': 'center', 'valign': 'top'})
+    for sheet_name, df in sheets:
+        _write_sheet(workbook, sheet_name, df, header_format)
+    workbook.close()
+    return output.getvalue()
+
+
+def build_analysis_workbook(summary_agg, comp_all, groups=ACCOUNT_GROUPS):
+    export_inv = summary_agg[['품목계정그룹', '전기말_재고', '전기동월말_재고', '전월말_재고', '당월말_재고', '재고증감_vs전기말', '재고증감_vs전기동월', '재고증감_vs전월']]
+    export_inv = append_total_for_excel(export_inv, label_col='품목계정그룹')
+
+    export_cogs = summary_agg[summary_agg['품목계정그룹'] != '반제품'][['품목계정그룹', '당기누적_판매출고', '전기동기_판매출고', '판매_YoY증감', '당월_판매출고', '전월_판매출고', '판매_MoM증감']]
+    export_cogs.columns = ['품목계정그룹', '당기누적_매출원가', '전기누적_매출원가', '전기대비_차이증감', '당월_매출원가', '전월_매출원가', '전월대비_차이증감']
+    export_cogs = append_total_for_excel(export_cogs, label_col='품목계정그룹')
+
+    export_mat = summary_agg[summary_agg['품목계정그룹'].isin(['원재료', '부재료'])][['품목계정그룹', '당기누적_생산출고', '전기동기_생산출고', '생산_YoY증감', '당월_생산출고', '전월_생산출고', '생산_MoM증감']]
+    export_mat.columns = ['품목계정그룹', '당기누적_재료비', '전기누적_재료비', '전기대비_차이증감', '당월_재료비', '전월_재료비', '전월대비_차이증감']
+    export_mat = append_total_for_excel(export_mat, label_col='품목계정그룹')
+
+    export_detail = comp_all.assign(품목계정그룹=pd.Categorical(comp_all['품목계정그룹'], categories=groups, ordered=True))
+    export_detail = export_detail.sort_values(['품목계정그룹', '분석그룹', '품목코드'])
+    export_detail = export_detail[(export_detail[PERIOD_VALUE_COLUMNS] != 0).any(axis=1)]
+    export_detail = export_detail.rename(columns=DETAIL_EXPORT_RENAME)[DETAIL_EXPORT_COLUMNS]
+
+    return _build_workbook([
+        ('기말재고_총괄', export_inv),
+        ('매출원가_총괄', export_cogs),
+        ('재료비_총괄', export_mat),
+        ('품목별_상세분석', export_detail),
+    ])
+
+
+def build_mapping_workbook(items, item_groups):
+    mapping = items[['품목계정그룹', '품목코드', '품목명']].assign(분석그룹=item_groups.to_numpy())
+    return _build_workbook([('Sheet1', mapping)])
+
+
+# 8. 전체 분석 실행 (Streamlit 없이 배치/CLI 에서 사용): 5개 기간 자료 -> (품목별 비교표, 계정별 총괄)
+def run_analysis(period_dfs, mapping_dict=None):
+    item_index = build_item_index(period_dfs)
+    comp_all = build_comparison(item_index.items, aggregate_periods(period_dfs, item_index))
+    comp_all['분석그룹'] = apply_group_mapping(comp_all, mapping_dict)
+    return comp_all, summarize_by_account(comp_all)
+
+
+# 9. 월별 추이 분석: 월별 원가수불부(한 달치, 기준월 분석의 '당월' 파일) 여러 개 -> 지표 x 품목 x 월 금액 행렬
+# - 월 축은 기준월까지의 연속 월(표시 기간 + 앞쪽 비교 기준 월), 자료가 없는 월은 NaN (증감도 NaN 으로 남겨 0 과 구분)
+# - 품목 ID 는 기간 비교와 같은 build_item_index 로 만들고, 지표별 금액은 (품목 ID, 월) 칸 번호 한 번의 bincount 로 합산
+# - 전월/전년 동월 대비 증감은 월 축을 1칸/12칸 민 행렬과의 차이로 모든 월을 한 번에 계산
+TREND_METRICS = {'기말재고': '기말재고_금액', '매출원가': '판매출고_금액', '재료비': '생산출고_금액'}
+TREND_MEASURES = {'금액': 0, '전월대비': 1, '전년동월대비': 12}  # 측정값 -> 비교할 이전 월 수 (0: 금액 그대로)
+# 표시 기간 앞에 비교 기준으로 더 읽는 월 수: 표시하는 모든 월에 전년 동월 대비 증감이 있도록
+TREND_BASE_MONTHS = max(TREND_MEASURES.values())
+# 지표별 대상 품목계정그룹: 기준월 분석의 탭/총괄 보고서와 같은 범위 (매출원가는 반제품 제외, 재료비는 원재료/부재료만)
+TREND_METRIC_ACCOUNTS = {
+    '기말재고': ACCOUNT_GROUPS,
+    '매출원가': [g for g in ACCOUNT_GROUPS if g != '반제품'],
+    '재료비': ['원재료', '부재료'],
+}
+
+# 파일명의 년/월 (예: 2026-03.xlsx, 202603_원가수불부.csv, 2026년 3월.xlsx)
+# - 붙여 쓴 월은 두 자리만 인정하고, 월 뒤에는 '월'/구분자/끝만 허용
+#   (2026_1공장_03.xlsx, ERP_20261_v2.xlsx 처럼 애매한 이름은 월을 추정하지 않음)
+_MONTH_PATTERN = re.compile(r'(?<!\d)(20\d{2})(?:[-_.년]\s*(1[0-2]|0?[1-9])|(0[1-9]|1[0-2]))(?=월|[^0-9A-Za-z가-힣]|$)')
+
+
+def parse_ledger_month(file_name):
+    match = _MONTH_PATTERN.search(os.path.splitext(os.path.basename(file_name))[0])
+    return (int(match.group(1)), int(match.group(2) or match.group(3))) if match else None
+
+
+def month_label(year, month):
+    return f"{int(year)}-{int(month):02d}"
+
+
+# 기준월을 마지막으로 하는 연속 n_months 개월 [(년, 월), ...] (과거 -> 최근)
+def trailing_months(year, month, n_months):
+    last = int(year) * 12 + int(month) - 1
+    return [(m // 12, m % 12 + 1) for m in range(last - n_months + 1, last + 1)]
+
+
+@dataclass(frozen=True)
+class TrendMatrix:
+    items: pd.DataFrame  # 품목 마스터 (행 번호 = 품목 ID)
+    months: list         # [(년, 월), ...] 연속 월
+    amounts: np.ndarray  # (지표, 품목, 월) 금액, 지표 순서는 TREND_METRICS
+
+    @property
+    def labels(self):
+        return [month_label(*m) for m in self.months]
+
+
+# month_dfs: months 와 같은 순서의 월별 자료 (자료가 없는 월은 None)
+def build_trend_matrix(month_dfs, item_index, months):
+    n_items, n_months = len(item_index.items), len(months)
+    present = [m for m, ids in enumerate(item_index.period_ids) if ids is not None]
+    cells = np.concatenate([item_index.period_ids[m] * n_months + m for m in present])
+
+    amounts = np.empty((len(TREND_METRICS), n_items, n_months))
+    for k, src in enumerate(TREND_METRICS.values()):
+        weights = np.concatenate([item_index.values(m, month_dfs[m], src) if src in month_dfs[m].columns
+                                  else np.zeros(len(item_index.period_ids[m])) for m in present])
+        amounts[k] = np.bincount(cells, weights=weights, minlength=n_items * n_months).reshape(n_items, n_months)
+    amounts[:, :, [d is None for d in month_dfs]] = np.nan
+    return TrendMatrix(item_index.items, list(months), amounts)
+
+
+# 마지막 축(월) 기준 측정값 (측정값, ...) 배열: 금액 + lag 개월 전 대비 증감 (비교 대상이 없는 앞쪽 월은 NaN)
+def trend_measures(values):
+    out = np.full((len(TREND_MEASURES),) + values.shape, np.nan)
+    for i, lag in enumerate(TREND_MEASURES.values()):
+        if lag == 0:
+            out[i] = values
+        elif lag < values.shape[-1]:
+            out[i][..., lag:] = values[..., lag:] - values[..., :-lag]
+    return out
+
+
+# 품목계정그룹 x 분석그룹별 월 합계와 증감 (분석그룹이 바뀔 때만 다시 계산, 차트는 이 표에서 조회)
+# - index (지표, 품목계정그룹, 분석그룹), 열 (측정값, 월), 지표별로 TREND_METRIC_ACCOUNTS 의 계정만 포함
+# - window: 표시할 마지막 월 수 (증감은 그 앞의 비교 기준 월까지 포함해 계산한 뒤 표시 기간만 남김)
+def summarize_trend(trend, item_groups, window=None):
+    # 계정/분석그룹을 각각 정렬 factorize 한 뒤 정수 조합으로 묶음 (문자열 튜플을 만들지 않음)
+    account_codes, accounts = pd.factorize(trend.items['품목계정그룹'].astype(str), sort=True)
+    group_codes, group_names = pd.factorize(pd.Series(np.asarray(item_groups)).astype(str), sort=True)
+    keys, codes = np.unique(account_codes * len(group_names) + group_codes, return_inverse=True)
+    groups = list(zip(accounts[keys // len(group_names)], group_names[keys % len(group_names)]))
+    n_groups, n_months = len(groups), len(trend.months)
+
+    cells = (codes[:, None] * n_months + np.arange(n_months)).ravel()
+    totals = np.stack([np.bincount(cells, weights=values.ravel(), minlength=n_groups * n_months).reshape(n_groups, n_months)
+                       for values in trend.amounts])
+    start = n_months - min(window or n_months, n_months)
+    measures = trend_measures(totals)[..., start:]  # (측정값, 지표, 분석그룹, 표시 월)
+
+    data = measures.transpose(1, 2, 0, 3).reshape(len(TREND_METRICS) * n_groups, len(TREND_MEASURES) * (n_months - start))
+    keys = [(metric,) + g for metric in TREND_METRICS for g in groups]
+    keep = np.array([account in TREND_METRIC_ACCOUNTS[metric] for metric, account, _ in keys], dtype=bool)
+    index = pd.MultiIndex.from_tuples([k for k, kept in zip(keys, keep) if kept], names=['지표', '품목계정그룹', '분석그룹'])
+    columns = pd.MultiIndex.from_product([list(TREND_MEASURES), trend.labels[start:]], names=['측정값', '월'])
+    return pd.DataFrame(data[keep], index=index, columns=columns)
+
+
+def _metric_block(trend_totals, metric):
+    return trend_totals[trend_totals.index.get_level_values('지표') == metric].droplevel('지표')
+
+
+# 선택한 지표/계정에 합계가 있는 분석그룹 (이름순)
+def trend_group_names(trend_totals, metric, account=None):
+    index = _metric_block(trend_totals, metric).index
+    if account is not None:
+        index = index[index.get_level_values('품목계정그룹') == account]
+    return sorted(index.get_level_values('분석그룹').unique())
+
+
+# 선택한 지표의 (계정, 분석그룹) 합계를 월별 표로 (행: 월, 열: 측정값), account/group 이 None 이면 지표의 대상 계정 전체
+def trend_series(trend_totals, metric, account=None, group=None):
+    block = _metric_block(trend_totals, metric)
+    mask = np.ones(len(block), dtype=bool)
+    if account is not None:
+        mask &= block.index.get_level_values('품목계정그룹') == account
+    if group is not None:
+        mask &= block.index.get_level_values('분석그룹') == group
+    series = block[mask].sum(min_count=1)
+    return series.unstack('측정값')[list(TREND_MEASURES)]
+
+
+# 선택한 월의 품목별 금액과 증감 (상세 표: 지표의 대상 계정 품목, 해당 월 열만 계산)
+# - month_pos: trend.months 전체(비교 기준 월 포함) 기준 위치
+def trend_items(trend, metric, month_pos, item_groups):
+    rows = np.flatnonzero(trend.items['품목계정그룹'].isin(TREND_METRIC_ACCOUNTS[metric]).to_numpy())
+    values = trend.amounts[list(TREND_METRICS).index(metric)][rows]
+    detail = trend.items[['품목계정그룹', '품목코드', '품목명']].iloc[rows].assign(분석그룹=np.asarray(item_groups)[rows])
+    for measure, lag in TREND_MEASURES.items():
+        if lag == 0:
+            detail[measure] = values[:, month_pos]
+        elif month_pos >= lag:
+            detail[measure] = values[:, month_pos] - values[:, month_pos - lag]
+        else:
+            detail[measure] = np.nan
+    return detail
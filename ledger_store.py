@@ -0,0 +1,108 @@
+import os
+import tempfile
+from dataclasses import dataclass
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# 전처리된 원가수불부를 Parquet 으로 보관하는 로컬 저장소
+# - 경로: {root}/{년도}/{월:02d}/{역할}.parquet
+# - 매월 다시 올리던 과거 자료(전월, 전기 동기 누적, 전기 전체)를 업로드 없이 재사용
+
+LEDGER_ROLES = ['당월', '전월', '당기누적', '전기동기', '전기전체']
+DEFAULT_STORE_DIR = os.environ.get('LEDGER_STORE_DIR', 'ledger_store')
+
+_META_SOURCE_HASH = b'ledger_source_sha256'
+_META_PARSER_VERSION = b'ledger_parser_version'
+
+
+@dataclass(frozen=True)
+class StoredLedger:
+    year: int
+    month: int
+    role: str
+    path: str
+    source_hash: str
+
+
+# 같은 기간을 가리키는 다른 기준월의 저장 자료 (예: 3월 기준 '전월' == 2월 기준 '당월')
+def period_aliases(year, month, role):
+    aliases = [(year, month, role)]
+    if role == '전월':
+        prev_year, prev_month = (year, month - 1) if month > 1 else (year - 1, 12)
+        aliases.append((prev_year, prev_month, '당월'))
+    elif role == '전기동기':
+        aliases.append((year - 1, month, '당기누적'))
+    elif role == '전기전체':
+        aliases.append((year - 1, 12, '당기누적'))
+        aliases += [(year, m, '전기전체') for m in range(12, 0, -1) if m != month]
+    return aliases
+
+
+class LedgerStore:
+    def __init__(self, root=DEFAULT_STORE_DIR, parser_version=None):
+        self.root = root
+        self.parser_version = parser_version
+
+    def path(self, year, month, role):
+        if role not in LEDGER_ROLES:
+            raise ValueError(f"알 수 없는 파일 역할: {role}")
+        return os.path.join(self.root, str(int(year)), f"{int(month):02d}", f"{role}.parquet")
+
+    def save(self, df, year, month, role, source_hash):
+        path = self.path(year, month, role)
+        existing = self.get(year, month, role)
+        if existing is not None and existing.source_hash == source_hash:
+            return existing
+
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        metadata = dict(table.schema.metadata or {})
+        metadata[_META_SOURCE_HASH] = source_hash.encode()
+        metadata[_META_PARSER_VERSION] = str(self.parser_version).encode()
+        table = table.replace_schema_metadata(metadata)
+
+        # 쓰는 도중 다른 세션이 읽지 않도록 임시 파일에 쓴 뒤 교체
+        # - 세션은 같은 프로세스의 스레드이므로 임시 파일 이름은 저장할 때마다 새로 만듦
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=f"{role}.", suffix='.tmp')
+        os.close(fd)
+        try:
+            pq.write_table(table, tmp_path)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path): os.remove(tmp_path)
+            raise
+        return StoredLedger(int(year), int(month), role, path, source_hash)
+
+    def get(self, year, month, role):
+        path = self.path(year, month, role)
+        if not os.path.exists(path): return None
+        try:
+            metadata = pq.read_schema(path).metadata or {}
+        except (OSError, pa.ArrowException):
+            return None
+        # 전처리 로직이 바뀐 뒤 저장된 자료는 열 구성이 다를 수 있으므로 사용하지 않음
+        if metadata.get(_META_PARSER_VERSION, b'').decode() != str(self.parser_version):
+            return None
+        return StoredLedger(int(year), int(month), role, path, metadata.get(_META_SOURCE_HASH, b'').decode())
+
+    def find(self, year, month, role):
+        for key in period_aliases(year, month, role):
+            entry = self.get(*key)
+            if entry is not None: return entry
+        return None
+
+    # 월별 추이 분석: 한 달치 자료 = 해당 월 기준 '당월' 또는 다음 달 기준 '전월'
+    def find_month(self, year, month):
+        next_year, next_month = (year, month + 1) if month < 12 else (year + 1, 1)
+        for key in [(year, month, '당월'), (next_year, next_month, '전월')]:
+            entry = self.get(*key)
+            if entry is not None: return entry
+        return None
+
+    # memory_map + 열 선택 로드: 필요한 열만 읽어 과거 기간 재조회가 즉시 끝나도록 함
+    def load(self, entry, columns=None):
+        if columns is not None:
+            available = set(pq.read_schema(entry.path).names)
+            columns = [c for c in columns if c in available]
+        return pq.read_table(entry.path, columns=columns, memory_map=True).to_pandas()
@@ -0,0 +1,213 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from inventory_engine import (ACCOUNT_GROUPS, TREND_BASE_MONTHS, VIEW_ACTIVITY_COLUMNS, build_item_index, build_summary_cube,
+                              build_trend_matrix, month_label, parse_ledger_month, run_analysis, summarize_cube,
+                              summarize_trend, trailing_months, trend_items, trend_series)
+
+# 기간 비교 엔진(run_analysis)을 변경 전 앱의 품목 마스터 취합 + merge 체인과 비교
+# - 직접 만든 5개 기간 자료: 품목코드 중복 행, 금액 열이 없는 기간, 품목코드가 빈 행, 빈 기간 포함
+
+
+def legacy_item_master(dfs):
+    all_items_list = []
+    for d in dfs:
+        if d is not None and not d.empty:
+            cols = [c for c in ['품목코드', '품목명', '단위', '품목계정그룹'] if c in d.columns]
+            if '품목코드' in cols:
+                all_items_list.append(d[cols])
+
+    all_items = pd.concat(all_items_list).drop_duplicates('품목코드')
+    for col in ['품목명', '단위', '품목계정그룹']:
+        if col not in all_items.columns:
+            all_items[col] = ""
+        else:
+            all_items[col] = all_items[col].fillna("")
+    all_items['분석그룹'] = all_items['품목명'].apply(lambda x: str(x).split('-')[0].strip())
+    return all_items.reset_index(drop=True)
+
+
+def legacy_comparison(dfs):
+    def agg_df(df, cols):
+        if df is None or df.empty: return pd.DataFrame(columns=['품목코드'] + cols)
+        valid_cols = [c for c in cols if c in df.columns]
+        if not valid_cols: return pd.DataFrame(columns=['품목코드'] + cols)
+        df[valid_cols] = df[valid_cols].apply(pd.to_numeric, errors='coerce').fillna(0)
+        return df.groupby('품목코드')[valid_cols].sum().reset_index()
+
+    d_curr_m, d_prev_m, d_curr_ytd, d_prev_ytd, d_prev_full = [d.copy() for d in dfs]
+    comp_all = legacy_item_master(dfs)
+    comp_all = comp_all.merge(agg_df(d_curr_m, ['생산출고_금액', '판매출고_금액', '기말재고_금액']), on='품목코드', how='left')\
+                        .rename(columns={'생산출고_금액': '당월_생산출고', '판매출고_금액': '당월_판매출고', '기말재고_금액': '당월말_재고'})
+    comp_all = comp_all.merge(agg_df(d_prev_m, ['생산출고_금액', '판매출고_금액', '기말재고_금액']), on='품목코드', how='left')\
+                        .rename(columns={'생산출고_금액': '전월_생산출고', '판매출고_금액': '전월_판매출고', '기말재고_금액': '전월말_재고'})
+    comp_all = comp_all.merge(agg_df(d_curr_ytd, ['생산출고_금액', '판매출고_금액']), on='품목코드', how='left')\
+                        .rename(columns={'생산출고_금액': '당기누적_생산출고', '판매출고_금액': '당기누적_판매출고'})
+    comp_all = comp_all.merge(agg_df(d_prev_ytd, ['생산출고_금액', '판매출고_금액', '기말재고_금액']), on='품목코드', how='left')\
+                        .rename(columns={'생산출고_금액': '전기동기_생산출고', '판매출고_금액': '전기동기_판매출고', '기말재고_금액': '전기동월말_재고'})
+    comp_all = comp_all.merge(agg_df(d_prev_full, ['기말재고_금액']), on='품목코드', how='left')\
+                        .rename(columns={'기말재고_금액': '전기말_재고'})
+    comp_all = comp_all.fillna(0)
+
+    comp_all['재고증감_vs전기말'] = comp_all['당월말_재고'] - comp_all['전기말_재고']
+    comp_all['재고증감_vs전기동월'] = comp_all['당월말_재고'] - comp_all['전기동월말_재고']
+    comp_all['재고증감_vs전월'] = comp_all['당월말_재고'] - comp_all['전월말_재고']
+    comp_all['판매_YoY증감'] = comp_all['당기누적_판매출고'] - comp_all['전기동기_판매출고']
+    comp_all['판매_MoM증감'] = comp_all['당월_판매출고'] - comp_all['전월_판매출고']
+    comp_all['생산_YoY증감'] = comp_all['당기누적_생산출고'] - comp_all['전기동기_생산출고']
+    comp_all['생산_MoM증감'] = comp_all['당월_생산출고'] - comp_all['전월_생산출고']
+    return comp_all
+
+
+def ledger(rows, amount_columns=('생산출고_금액', '판매출고_금액', '기말재고_금액')):
+    columns = ['품목계정그룹', '품목코드', '품목명', '단위'] + list(amount_columns)
+    return pd.DataFrame(rows, columns=columns)
+
+
+def plain(df):
+    return df.astype({c: str for c in df.columns if isinstance(df[c].dtype, pd.CategoricalDtype)})
+
+
+# 당월: 같은 품목코드 여러 행(합산) / 전월: 당월에 없는 품목 / 당기누적: 판매출고 열 없음
+# 전기동기: 빈 기간 / 전기전체: 기말재고 열 없음(금액 열이 하나도 없는 기간)
+@pytest.fixture
+def period_dfs():
+    curr_m = ledger([
+        ['제품', 'P001', '완제품A-500ml', 'EA', 100.0, 2000.0, 300.0],
+        ['제품', 'P001', '완제품A-500ml', 'EA', 50.0, 500.0, 0.0],
+        ['원재료', 'M001', '원료B', 'KG', 700.0, 0.0, 1200.0],
+        ['상품', 'G001', '상품C', 'BOX', 0.0, 80.0, 40.0],
+    ])
+    prev_m = ledger([
+        ['제품', 'P001', '완제품A-500ml', 'EA', 90.0, 1800.0, 250.0],
+        ['부재료', 'S001', '포장재D-소', 'EA', 30.0, 0.0, 60.0],
+    ])
+    curr_ytd = ledger([
+        ['제품', 'P001', '완제품A-500ml', 'EA', 400.0],
+        ['원재료', 'M001', '원료B', 'KG', 2100.0],
+        ['부재료', 'S001', '포장재D-소', 'EA', 90.0],
+    ], amount_columns=['생산출고_금액'])
+    prev_ytd = ledger([])
+    prev_full = ledger([
+        ['반제품', 'H001', '반제품E', 'KG'],
+        ['원재료', 'M001', '원료B', 'KG'],
+    ], amount_columns=[])
+    return [curr_m, prev_m, curr_ytd, prev_ytd, prev_full]
+
+
+def with_blank_codes(df):
+    blank = df.iloc[:1].assign(품목계정그룹='원재료', 품목코드=pd.Series([np.nan], dtype='str'), 품목명='소계')
+    return pd.concat([df, blank], ignore_index=True)
+
+
+def test_run_analysis_matches_legacy_merge_chain(period_dfs):
+    # 변경 전 merge 체인은 기간 자료에 일부 금액 열만 없는 경우를 처리하지 못하므로 0 으로 채운 자료와 비교
+    legacy_dfs = [d.copy() for d in period_dfs]
+    legacy_dfs[2]['판매출고_금액'] = 0.0
+    expected = legacy_comparison(legacy_dfs)
+
+    comp_all, _ = run_analysis(period_dfs)
+    pd.testing.assert_frame_equal(plain(comp_all)[expected.columns], expected, check_dtype=False)
+    assert list(comp_all['품목코드']) == ['P001', 'M001', 'G001', 'S001', 'H001']
+
+
+def test_run_analysis_ignores_blank_item_codes(period_dfs):
+    blank_dfs = [with_blank_codes(d) if not d.empty else d for d in period_dfs]
+    expected, expected_summary = run_analysis(period_dfs)
+    comp_all, summary = run_analysis(blank_dfs)
+    pd.testing.assert_frame_equal(comp_all, expected)
+    pd.testing.assert_frame_equal(summary, expected_summary)
+
+
+def test_run_analysis_empty_period_is_zero(period_dfs):
+    comp_all, _ = run_analysis(period_dfs)
+    for col in ['전기동기_생산출고', '전기동기_판매출고', '전기동월말_재고', '전기말_재고']:
+        assert (comp_all[col] == 0).all(), col
+    assert comp_all.notna().all().all()
+
+
+# 집계 큐브(build_summary_cube/summarize_cube)를 계정 x 화면(탭)마다 비교표를 직접 거른 groupby 결과와 비교
+# - 화면 표시 품목: 해당 화면의 기간 금액 중 하나라도 0 이 아닌 품목 (금액이 모두 0 인 품목, 품목이 없는 계정 포함)
+TAB_COLUMNS = {
+    'inventory': ['전기말_재고', '전기동월말_재고', '전월말_재고', '당월말_재고', '재고증감_vs전기말', '재고증감_vs전기동월', '재고증감_vs전월'],
+    'cogs': ['당기누적_판매출고', '전기동기_판매출고', '판매_YoY증감', '당월_판매출고', '전월_판매출고', '판매_MoM증감'],
+    'material': ['당기누적_생산출고', '전기동기_생산출고', '생산_YoY증감', '당월_생산출고', '전월_생산출고', '생산_MoM증감'],
+}
+
+
+@pytest.fixture
+def random_comparison():
+    rng = np.random.default_rng(7)
+    n_items = 300
+    accounts = rng.choice(['제품', '상품', '원재료', '부재료'], n_items)  # 반제품: 품목 없는 계정
+    names = [f"{g}-{i}" for i, g in enumerate(rng.choice(['나그룹', '가그룹', '다그룹', 'B그룹', 'A그룹'], n_items))]
+    dfs = []
+    for _ in range(5):
+        amounts = rng.integers(1, 1000, (n_items, 3)).astype('float64') * (rng.random((n_items, 3)) < 0.3)
+        dfs.append(pd.DataFrame({'품목계정그룹': accounts, '품목코드': [f"C{i:04d}" for i in range(n_items)], '품목명': names,
+                                 '단위': 'EA', '생산출고_금액': amounts[:, 0], '판매출고_금액': amounts[:, 1],
+                                 '기말재고_금액': amounts[:, 2]}))
+    return run_analysis(dfs)
+
+
+@pytest.mark.parametrize('account', ACCOUNT_GROUPS)
+@pytest.mark.parametrize('view', list(VIEW_ACTIVITY_COLUMNS))
+def test_summary_cube_matches_groupby(random_comparison, account, view):
+    comp_all, _ = random_comparison
+    cube = build_summary_cube(comp_all)
+    columns = TAB_COLUMNS[view]
+
+    account_rows = comp_all[comp_all['품목계정그룹'] == account]
+    view_rows = account_rows[(account_rows[VIEW_ACTIVITY_COLUMNS[view]] != 0).any(axis=1)]
+    expected = plain(view_rows).groupby('분석그룹')[columns].sum().reset_index()
+
+    pd.testing.assert_frame_equal(plain(cube.rows(comp_all, account, view)), plain(view_rows))
+    assert cube.count(account, view) == len(view_rows)
+    assert cube.count(account) == len(account_rows)
+    pd.testing.assert_frame_equal(plain(cube.group_summary(account, view, columns)).reset_index(drop=True), expected,
+                                  check_dtype=False, check_index_type=False)
+
+
+def test_summarize_cube_matches_summarize_by_account(random_comparison):
+    comp_all, summary = random_comparison
+    pd.testing.assert_frame_equal(summarize_cube(build_summary_cube(comp_all)), summary, check_dtype=False)
+
+
+# 파일명의 년/월 인식: 애매한 이름(공장 번호, 붙여 쓴 한 자리 월, 일자까지 붙은 이름)은 월을 추정하지 않음
+@pytest.mark.parametrize('file_name, expected', [
+    ('2026-03.xlsx', (2026, 3)),
+    ('2026-3.csv', (2026, 3)),
+    ('202603_원가수불부.csv', (2026, 3)),
+    ('202602(수정).xlsx', (2026, 2)),
+    ('2026년 3월.xlsx', (2026, 3)),
+    ('2026년3월 원가수불부.xlsx', (2026, 3)),
+    ('원가수불부_2025.12.xlsx', (2025, 12)),
+    ('uploads/2026_11.csv', (2026, 11)),
+    ('2026_1공장_03.xlsx', None),
+    ('ERP_20261_v2.xlsx', None),
+    ('2026_13.xlsx', None),
+    ('20260315.xlsx', None),
+    ('12026-03.xlsx', None),
+    ('원가수불부.xlsx', None),
+])
+def test_parse_ledger_month(file_name, expected):
+    assert parse_ledger_month(file_name) == expected
+
+
+# 월별 추이: 표시 기간 앞의 비교 기준 월까지 읽으면 표시하는 모든 월에 전년 동월 대비 증감이 있음
+def test_summarize_trend_window_has_yoy_for_every_month():
+    window = 12
+    months = trailing_months(2026, 3, window + TREND_BASE_MONTHS)
+    dfs = [ledger([['원재료', 'M001', '원료B', 'KG', 10.0 * (m + 1), 0.0, 100.0 + m],
+                   ['제품', 'P001', '완제품A', 'EA', 0.0, 5.0 * m, 50.0]]) for m in range(len(months))]
+    item_index = build_item_index(dfs)
+    trend = build_trend_matrix(dfs, item_index, months)
+    totals = summarize_trend(trend, item_index.items['분석그룹'], window)
+
+    series = trend_series(totals, '재료비')
+    assert list(series.index) == [month_label(*m) for m in months[-window:]]
+    assert series.notna().all().all()
+    assert (series['전년동월대비'] == 10.0 * TREND_BASE_MONTHS).all()
+    assert (series['전월대비'] == 10.0).all()
+    assert trend_items(trend, '기말재고', len(months) - 1, item_index.items['분석그룹'])['전년동월대비'].tolist() == [12.0, 0.0]